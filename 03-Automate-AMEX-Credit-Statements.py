@@ -1,214 +1,239 @@
-'''
-
-This script is used to parse the dividends text from the PDF file and save the results to an Excel file.
-uv init to create pyproject.toml, uv.lock and .venv/
-Install packages with uv and not pip. uv add pdfplumber pandas
-To run the scripy, uv run python ParseDividendsText.py
-'''
-
-
-import pdfplumber
-import pandas as pd
-import re
-from pathlib import Path
-from datetime import datetime
-
-# 1) Paths
-base_dir = Path(r"Amex")
-pdf_files = sorted(base_dir.rglob("*.pdf"))
-output_excel = r"AmexCreditCardDetails.xlsx"
-
-# 2) Markers (robust for old/new PDFs)
-start_marker_re = re.compile(r"Details\s+Foreign\s+Spending\s+Amount\s*S\$", re.IGNORECASE)
-end_marker = "Total of New Transactions"
-
-# 3) Regex
-DATE_DDMMYY_DOTS_RE = re.compile(r"^\d{2}\.\d{2}\.\d{2}\b")
-
-# Matches:
-# 31.01.21 PAYMENT BY TELEPHONE/INTERNET BANKING 723.40
-# 19.01.21 XTRA AMK HUB SINGAPORE 25.35
-# and also handles amount with trailing CR on same line: 723.40CR
-TX_RE = re.compile(
-    r"^(?P<date>\d{2}\.\d{2}\.\d{2})\s+"
-    r"(?P<desc>.+?)\s+"
-    r"(?P<amt>[0-9,]+\.\d{2})(?P<cr>CR)?\s*$"
-)
-
-def format_date_and_year(date_str: str) -> tuple[str, str]:
-    """
-    Input:  dd.mm.yy  (example: 25.10.20)
-    Output: ("25 OCT", "2020")
-    """
-    dt = datetime.strptime(date_str, "%d.%m.%y")
-    day_mon = dt.strftime("%d %b").upper()   # "04 NOV"
-    year_yyyy = dt.strftime("%Y")            # "2020"
-    return day_mon, year_yyyy
-
-def format_amount_for_excel(amount_str: str, is_credit: bool) -> str:
-    """
-    amount_str: like "36.12" (may contain commas)
-    is_credit: True if CR applies
-    Returns: "(36.12)" for credit, else "36.12"
-    """
-    amt = (amount_str or "").replace(",", "").strip()
-    return f"({amt})" if is_credit else amt
-
-def is_redundant_line(line: str) -> bool:
-    s = (line or "").strip()
-    if not s:
-        return True
-
-    if s == end_marker or start_marker_re.search(s):
-        return True
-
-    # Common AMEX statement noise (add more phrases here if you encounter them)
-    redundant_substrings = [
-        "American Express International",
-        "UEN",
-        "Statement of Account",
-        "Prepared for Membership Number",
-        "Membership Number",
-        "PAYMENT ADVICE",
-        "Please return",
-        "Minimum Payment",
-        "Due by",
-        "Enter amount enclosed",
-        "Please make crossed cheque payable",
-        "AMERICAN EXPRESS",
-        "Please do not write",
-        "The Rewards Card",
-        "Page ",
-        "Important Information",
-        "Foreign Currency Charges",
-        "Online Services",
-        "Payment Method",
-        "Privacy:",
-        "Limited Liability",
-        "Credit Card Interest Rate Policy",
-        "log on to americanexpress.com.sg",
-        "amex.co/",
-        "reply envelope",
-    ]
-
-    s_lower = s.lower()
-    return any(sub.lower() in s_lower for sub in redundant_substrings)
-
-def parse_transaction_line(line: str):
-    """
-    Returns dict with:
-      - Transaction Date Captured  (dd MMM, example: 04 NOV)
-      - Year                       (yyyy, example: 2020)
-      - Description Captured
-      - Amount Captured            ((36.12) for CR, else 36.12)
-    Or None if the line is not a transaction row.
-    """
-    m = TX_RE.match(line.strip())
-    if not m:
-        return None
-
-    raw_date = m.group("date")
-    try:
-        tx_date, year_yyyy = format_date_and_year(raw_date)
-    except Exception:
-        tx_date, year_yyyy = raw_date, ""
-
-    amt = format_amount_for_excel(m.group("amt"), bool(m.group("cr")))
-
-    return {
-        "Transaction Date Captured": tx_date,
-        "Year": year_yyyy,
-        "Description Captured": m.group("desc").strip(),
-        "Amount Captured": amt,
-    }
-
-def extract_marker_segments(all_text: str) -> list[str]:
-    # normalize common invisible spaces
-    all_text = all_text.replace("\xa0", " ")
-
-    em = re.escape(end_marker)
-
-    # Find: start_marker ... until next start_marker or end_marker
-    seg_re = re.compile(
-        rf"(?:{start_marker_re.pattern})(.*?)(?=(?:{start_marker_re.pattern})|{em})",
-        flags=re.DOTALL | re.IGNORECASE
-    )
-    return [m.group(1) for m in seg_re.finditer(all_text)]
-
-def extract_rows_from_pdf(pdf_path: Path) -> list[dict]:
-    """Extract transaction rows from one PDF. Returns a list of dict rows."""
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        all_text = "\n".join((page.extract_text() or "") for page in pdf.pages)
-
-    # Pull all segments that start after the marker, across repeated pages
-    segments = extract_marker_segments(all_text)
-    if not segments:
-        print(f"[SKIP] Markers not found in: {pdf_path}")
-        return []
-
-    # Build clean lines from all segments
-    raw_lines: list[str] = []
-    for seg in segments:
-        raw_lines.extend([ln.strip() for ln in seg.splitlines()])
-
-    clean_lines: list[str] = []
-    for ln in raw_lines:
-        s = (ln or "").strip()
-        if not s:
-            continue
-        if is_redundant_line(s):
-            continue
-        clean_lines.append(s)
-
-    rows: list[dict] = []
-    i = 0
-    while i < len(clean_lines):
-        line = clean_lines[i].strip()
-
-        # Standalone "CR" line belongs to the previous transaction amount
-        if line == "CR":
-            if rows and isinstance(rows[-1].get("Amount Captured"), str):
-                prev = rows[-1]["Amount Captured"].strip()
-                if not (prev.startswith("(") and prev.endswith(")")):
-                    rows[-1]["Amount Captured"] = format_amount_for_excel(prev, True)
-            i += 1
-            continue
-
-        # Only send plausible transaction lines to the parser
-        if not DATE_DDMMYY_DOTS_RE.match(line):
-            i += 1
-            continue
-
-        rec = parse_transaction_line(line)
-        if not rec:
-            i += 1
-            continue
-
-        # If next line is "CR", attach it to amount (convert to parentheses)
-        if i + 1 < len(clean_lines) and clean_lines[i + 1].strip() == "CR":
-            rec["Amount Captured"] = format_amount_for_excel(rec["Amount Captured"], True)
-            i += 1
-
-        rows.append(rec)
-        i += 1
-
-    print(f"[OK] {pdf_path} -> {len(rows)} rows")
-    return rows
-
-# 4) Process all PDFs
-all_rows: list[dict] = []
-for pdf_file in pdf_files:
-    all_rows.extend(extract_rows_from_pdf(pdf_file))
-
-# 5) Save to Excel (single sheet, 4 columns with Year in between)
-df = pd.DataFrame(
-    all_rows,
-    columns=["Transaction Date Captured", "Year", "Description Captured", "Amount Captured"]
-)
-df.to_excel(output_excel, sheet_name="Transactions", index=False)
-
-print(f"Total PDFs scanned: {len(pdf_files)}")
-print(f"Total rows extracted: {len(df)}")
-print(f"Saved combined output to: {output_excel}")
-
-
+'''
+
+This script is used to parse the dividends text from the PDF file and save the results to an Excel file.
+uv init to create pyproject.toml, uv.lock and .venv/
+Install packages with uv and not pip. uv add pdfplumber pandas xlsxwriter
+To run the scripy, uv run python ParseDividendsText.py
+'''
+
+
+import pdfplumber
+import pandas as pd
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from calendar import monthrange
+
+# 1) Paths
+base_dir = Path(r"Amex")
+output_excel = r"AmexCreditCardDetails.xlsx"
+
+# 2) Markers (robust for old/new PDFs)
+start_marker_re = re.compile(r"Details\s+Foreign\s+Spending\s+Amount\s*S\$", re.IGNORECASE)
+end_marker = "Total of New Transactions"
+
+# Find: start_marker ... until next start_marker or end_marker
+SEGMENT_RE = re.compile(
+    rf"(?:{start_marker_re.pattern})(.*?)(?=(?:{start_marker_re.pattern})|{re.escape(end_marker)})",
+    flags=re.DOTALL | re.IGNORECASE
+)
+
+# 3) Regex
+# Matches:
+# 31.01.21 PAYMENT BY TELEPHONE/INTERNET BANKING 723.40
+# 19.01.21 XTRA AMK HUB SINGAPORE 25.35
+# and also handles amount with trailing CR on same line: 723.40CR
+TX_RE = re.compile(
+    r"^(?P<date>\d{2}\.\d{2}\.\d{2})\s+"
+    r"(?P<desc>.+?)\s+"
+    r"(?P<amt>[0-9,]+\.\d{2})(?P<cr>CR)?\s*$"
+)
+
+# Line break plus the spaces around it, so one split yields already-stripped lines
+LINE_SPLIT_RE = re.compile(r"[^\S\n]*\n[^\S\n]*")
+
+# Common AMEX statement noise (add more phrases here if you encounter them)
+REDUNDANT_SUBSTRINGS = [
+    "American Express International",
+    "UEN",
+    "Statement of Account",
+    "Prepared for Membership Number",
+    "Membership Number",
+    "PAYMENT ADVICE",
+    "Please return",
+    "Minimum Payment",
+    "Due by",
+    "Enter amount enclosed",
+    "Please make crossed cheque payable",
+    "AMERICAN EXPRESS",
+    "Please do not write",
+    "The Rewards Card",
+    "Page ",
+    "Important Information",
+    "Foreign Currency Charges",
+    "Online Services",
+    "Payment Method",
+    "Privacy:",
+    "Limited Liability",
+    "Credit Card Interest Rate Policy",
+    "log on to americanexpress.com.sg",
+    "amex.co/",
+    "reply envelope",
+]
+
+# One case-insensitive alternation so each line is scanned once instead of per phrase
+REDUNDANT_RE = re.compile("|".join(re.escape(sub) for sub in REDUNDANT_SUBSTRINGS), re.IGNORECASE)
+
+# Month number -> "%b" abbreviation, upper-cased (index 0 unused)
+MONTH_ABBR = ("", "JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+
+def format_date_and_year(date_str: str) -> tuple[str, str]:
+    """
+    Input:  dd.mm.yy  (example: 25.10.20)
+    Output: ("25 OCT", "2020")
+    Raises ValueError for an impossible date, like strptime did.
+    """
+    day = int(date_str[0:2])
+    month = int(date_str[3:5])
+    yy = int(date_str[6:8])
+    year = 2000 + yy if yy < 69 else 1900 + yy  # same pivot as strptime's %y
+
+    if not 1 <= month <= 12 or not 1 <= day <= monthrange(year, month)[1]:
+        raise ValueError(f"Invalid date: {date_str}")
+
+    day_mon = f"{day:02d} {MONTH_ABBR[month]}"   # "04 NOV"
+    year_yyyy = str(year)                        # "2020"
+    return day_mon, year_yyyy
+
+def format_amount_for_excel(amount_str: str, is_credit: bool) -> str:
+    """
+    amount_str: like "36.12" (may contain commas)
+    is_credit: True if CR applies
+    Returns: "(36.12)" for credit, else "36.12"
+    """
+    amt = (amount_str or "").replace(",", "").strip()
+    return f"({amt})" if is_credit else amt
+
+def is_redundant_line(line: str) -> bool:
+    s = (line or "").strip()
+    if not s:
+        return True
+
+    if s == end_marker or start_marker_re.search(s):
+        return True
+
+    return bool(REDUNDANT_RE.search(s))
+
+def parse_transaction_line(line: str):
+    """
+    Returns dict with:
+      - Transaction Date Captured  (dd MMM, example: 04 NOV)
+      - Year                       (yyyy, example: 2020)
+      - Description Captured
+      - Amount Captured            ((36.12) for CR, else 36.12)
+    Or None if the line is not a transaction row.
+    """
+    m = TX_RE.match(line)  # callers pass already-stripped lines
+    if not m:
+        return None
+
+    raw_date = m.group("date")
+    try:
+        tx_date, year_yyyy = format_date_and_year(raw_date)
+    except Exception:
+        tx_date, year_yyyy = raw_date, ""
+
+    amt = format_amount_for_excel(m.group("amt"), bool(m.group("cr")))
+
+    return {
+        "Transaction Date Captured": tx_date,
+        "Year": year_yyyy,
+        "Description Captured": m.group("desc").strip(),
+        "Amount Captured": amt,
+    }
+
+def extract_marker_segments(all_text: str) -> list[str]:
+    # normalize common invisible spaces
+    all_text = all_text.replace("\xa0", " ")
+
+    return [m.group(1) for m in SEGMENT_RE.finditer(all_text)]
+
+def read_pdf_text(pdf_path: Path) -> str:
+    """Return the text of all pages, releasing each page's parsed layout once read."""
+    pages_text = []
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        for page in pdf.pages:
+            pages_text.append(page.extract_text() or "")
+            page.close()
+    return "\n".join(pages_text)
+
+def extract_rows_from_pdf(pdf_path: Path) -> list[dict]:
+    """Extract transaction rows from one PDF. Returns a list of dict rows."""
+    all_text = read_pdf_text(pdf_path)
+
+    # Pull all segments that start after the marker, across repeated pages
+    segments = extract_marker_segments(all_text)
+    if not segments:
+        print(f"[SKIP] Markers not found in: {pdf_path}")
+        return []
+
+    # Build clean lines from all segments
+    raw_lines: list[str] = []
+    for seg in segments:
+        raw_lines.extend(LINE_SPLIT_RE.split(seg.strip()))
+
+    # Lines from LINE_SPLIT_RE are already stripped
+    clean_lines: list[str] = []
+    for s in raw_lines:
+        if not s:
+            continue
+        if is_redundant_line(s):
+            continue
+        clean_lines.append(s)
+
+    rows: list[dict] = []
+    i = 0
+    while i < len(clean_lines):
+        line = clean_lines[i]
+
+        # Standalone "CR" line belongs to the previous transaction amount
+        if line == "CR":
+            if rows and isinstance(rows[-1].get("Amount Captured"), str):
+                prev = rows[-1]["Amount Captured"]
+                if not (prev.startswith("(") and prev.endswith(")")):
+                    rows[-1]["Amount Captured"] = format_amount_for_excel(prev, True)
+            i += 1
+            continue
+
+        # TX_RE is anchored on the dd.mm.yy date, so it also rejects non-transaction lines
+        rec = parse_transaction_line(line)
+        if not rec:
+            i += 1
+            continue
+
+        # If next line is "CR", attach it to amount (convert to parentheses)
+        if i + 1 < len(clean_lines) and clean_lines[i + 1] == "CR":
+            rec["Amount Captured"] = format_amount_for_excel(rec["Amount Captured"], True)
+            i += 1
+
+        rows.append(rec)
+        i += 1
+
+    print(f"[OK] {pdf_path} -> {len(rows)} rows")
+    return rows
+
+# 4) Process all PDFs
+# Each PDF is parsed in its own worker process; the guard keeps worker imports
+# (spawned on Windows) from re-running the batch.
+if __name__ == "__main__":
+    pdf_files = sorted(base_dir.rglob("*.pdf"))
+
+    columns = ["Transaction Date Captured", "Year", "Description Captured", "Amount Captured"]
+
+    # 5) Save to Excel (single sheet, 4 columns with Year in between)
+    # Rows are appended per PDF as each worker returns (map keeps the file order),
+    # so the full row list is never held in memory.
+    total_rows = 0
+    with pd.ExcelWriter(output_excel, engine="xlsxwriter") as writer, ProcessPoolExecutor() as ex:
+        pd.DataFrame(columns=columns).to_excel(writer, sheet_name="Transactions", index=False)
+        for rows in ex.map(extract_rows_from_pdf, pdf_files):
+            if not rows:
+                continue
+            pd.DataFrame(rows, columns=columns).to_excel(
+                writer, sheet_name="Transactions", startrow=total_rows + 1, header=False, index=False
+            )
+            total_rows += len(rows)
+
+    print(f"Total PDFs scanned: {len(pdf_files)}")
+    print(f"Total rows extracted: {total_rows}")
+    print(f"Saved combined output to: {output_excel}")
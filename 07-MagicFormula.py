@@ -1,268 +1,283 @@
-import pandas as pd
-import re
-from pathlib import Path
-
-# ---------- Helpers ----------
-def extract_ticker_from_filename(name: str) -> str:
-    m = re.search(r"TIKR\s*-\s*([A-Z0-9]+)\s*-\s*Financials", name, flags=re.IGNORECASE)
-    if not m:
-        raise ValueError(f"Could not extract ticker from filename: {name}")
-    return m.group(1).upper()
-
-# UPDATED: Some TIKR filenames end with a 3-letter currency code, e.g. '-USD.xlsx' or '-CNY.xlsx'
-def extract_ccy_from_filename(name: str) -> str | None:
-    m = re.search(
-        r"[\u2010\u2011\u2012\u2013\u2014\u2212\-]\s*([A-Z]{3})\s*\.xlsx$",
-        name,
-        flags=re.IGNORECASE,
-    )
-    if not m:
-        return None
-    return m.group(1).upper()
-
-def _norm(s: str) -> str:
-    s = str(s).strip().lower()
-    s = re.sub(r"[\u2010\u2011\u2012\u2013\u2014\u2212\-]", " ", s)  # hyphen variants
-    s = re.sub(r"[^a-z0-9]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-def pick_year_column(sheet_df: pd.DataFrame, preferred_year: int = 2025) -> tuple[int, int]:
-    header = sheet_df.iloc[0, 1:]  # row 1, col B onward
-
-    # TIKR headers are mm/dd/yy
-    dates = pd.to_datetime(header, errors="coerce", format="%m/%d/%y")
-    years = dates.dt.year
-
-    valid = years.notna()
-    if not valid.any():
-        raise ValueError("No parseable date headers found in row 1 starting from column B.")
-
-    year_to_cols = {}
-    for offset, (ok, y) in enumerate(zip(valid.tolist(), years.tolist()), start=1):
-        if ok:
-            year_to_cols.setdefault(int(y), []).append(offset)
-
-    if preferred_year in year_to_cols:
-        chosen_year = preferred_year
-        chosen_col = year_to_cols[preferred_year][-1]
-    else:
-        chosen_year = max(year_to_cols.keys())
-        chosen_col = year_to_cols[chosen_year][-1]
-
-    return chosen_year, chosen_col
-
-
-def find_row_value(sheet_df: pd.DataFrame, label_variants: list[str], value_col: int) -> float | None:
-    col0 = sheet_df.iloc[:, 0].astype(str).map(_norm)
-    variants = [_norm(v) for v in label_variants]
-
-    hit = None
-    for v in variants:
-        m = col0.str.contains(re.escape(v))
-        idxs = sheet_df.index[m].tolist()
-        if idxs:
-            hit = idxs[0]
-            break
-
-    if hit is None:
-        return None
-
-    raw = sheet_df.iat[hit, value_col]
-    val = pd.to_numeric(raw, errors="coerce")
-    return None if pd.isna(val) else float(val)
-
-# ---------- Paths (relative to this .py file) ----------
-SCRIPT_DIR = Path(__file__).resolve().parent
-
-TIKR_DIR = SCRIPT_DIR / "TIKR"
-MARKETCAP_PATH = SCRIPT_DIR / "MarketCap" / "SGX-MarketCap.xlsx"
-OUTPUT_PATH = SCRIPT_DIR / "SGX-Magic-Formula.xlsx"
-
-if not TIKR_DIR.exists():
-    raise FileNotFoundError(f"TIKR folder not found: {TIKR_DIR}")
-
-if not MARKETCAP_PATH.exists():
-    raise FileNotFoundError(f"SGX-MarketCap.xlsx not found: {MARKETCAP_PATH}")
-
-# ---------- Load Market Cap file ----------
-mc = pd.read_excel(MARKETCAP_PATH)
-
-# Update for CCY calculation: SGD -> CCY FX rates (multiplier)
-# - Keep these rates here so you can update them easily when needed.
-SGD_TO_CCY_RATES: dict[str, float] = {
-    "MYR": 3.15,
-    "USD": 0.77,
-    "IDR": 12907.94,
-    "THB": 24.27,
-    "CNY": 5.43,
-    "EUR": 0.66,
-    "HKD": 6.00,
-}
-
-
-def market_cap_sgd_to_ccy_millions(mkt_cap_sgd: float | int | None, ccy: str | None) -> float | None:
-    """Convert a SGD market cap value to CCY (if provided) and return in millions."""
-    if mkt_cap_sgd is None:
-        return None
-
-    amt = pd.to_numeric(mkt_cap_sgd, errors="coerce")
-    if pd.isna(amt):
-        return None
-
-        # Update for CCY calculation: if CCY is empty/NaN, keep market cap in SGD.
-    if ccy is None or pd.isna(ccy) or str(ccy).strip() == "":
-        # No CCY suffix in filename (or missing CCY), keep market cap in SGD.
-        return float(amt) / 1_000_000
-
-    ccy_u = str(ccy).strip().upper()
-    if ccy_u not in SGD_TO_CCY_RATES:
-        msg = (
-            f"Update for CCY calculation: Missing SGD-> {ccy_u} rate. "
-            "Please update SGD_TO_CCY_RATES in the script."
-        )
-        print(msg)
-        raise ValueError(msg)
-
-    return (float(amt) * SGD_TO_CCY_RATES[ccy_u]) / 1_000_000
-
-ticker_col = next((c for c in mc.columns if _norm(c) in {"ticker", "tickers"}), None)
-company_col = next((c for c in mc.columns if _norm(c) in {"company name", "company"}), None)
-if ticker_col is None or company_col is None:
-    raise ValueError("Could not find required columns 'Ticker' and 'Company Name' in SGX-MarketCap.xlsx.")
-
-# UPDATED: Market cap source file changed - use the "Mkt Cap" column (instead of the last column)
-mkt_cap_col = next((c for c in mc.columns if _norm(c) in {"mkt cap", "market cap", "market capitalization"}), None)
-if mkt_cap_col is None:
-    raise ValueError("Could not find required column 'Mkt Cap' in SGX-MarketCap.xlsx.")
-
-marketcap_value_col = mkt_cap_col
-
-# Update for CCY calculation: keep Market Cap as raw SGD in the lookup.
-# Conversion to CCY (and to millions) is done per-row based on the file's CCY suffix.
-mc[marketcap_value_col] = pd.to_numeric(mc[marketcap_value_col], errors="coerce")
-mc_lookup = mc.copy()
-mc_lookup[ticker_col] = mc_lookup[ticker_col].astype(str).str.strip().str.upper()
-mc_lookup = mc_lookup.set_index(ticker_col)
-
-# ---------- Process TIKR financial files ----------
-#tikr_files = sorted(TIKR_DIR.glob("TIKR - * - Financials (*.xlsx"))
-tikr_files = sorted(TIKR_DIR.glob("TIKR - * - Financials*.xlsx"))
-
-print("Picked up these TIKR files:") # UPDATED
-for p in tikr_files: # UPDATED
-    print(" -", p.name) # UPDATED
-
-if not tikr_files:
-    raise FileNotFoundError(f"No TIKR financial files found in: {TIKR_DIR}")
-
-rows = []
-for fpath in tikr_files:
-    ticker = extract_ticker_from_filename(fpath.name)
-
-    # UPDATED: Extract optional 3-letter currency code suffix from filename (if present)
-    ccy = extract_ccy_from_filename(fpath.name)    
-    company_name = None
-    market_cap = None
-    raw_market_cap_sgd = None
-    if ticker in mc_lookup.index:
-        company_name = mc_lookup.at[ticker, company_col]
-        raw_market_cap_sgd = mc_lookup.at[ticker, marketcap_value_col]
-
-    if isinstance(company_name, pd.Series):
-        company_name = company_name.iloc[0]
-    if isinstance(raw_market_cap_sgd, pd.Series):
-        raw_market_cap_sgd = raw_market_cap_sgd.iloc[0]
-
-    # Update for CCY calculation: convert raw SGD market cap into the row CCY (if any), then to millions.
-    if raw_market_cap_sgd is not None:
-        market_cap = market_cap_sgd_to_ccy_millions(raw_market_cap_sgd, ccy)
-
-    # Income Statement
-    inc = pd.read_excel(fpath, sheet_name="Income Statement", header=None)
-    _, col_inc = pick_year_column(inc, preferred_year=2025) #update the year if i want to extract past years. If cannot find, default to most recent year
-    operating_income = find_row_value(inc, ["Operating Income"], col_inc)
-
-    # Balance Sheet
-    bs = pd.read_excel(fpath, sheet_name="Balance Sheet", header=None)
-    _, col_bs = pick_year_column(bs, preferred_year=2025) #update the year if i want to extract past years. If cannot find, default to most recent year
-
-    long_term_debt = find_row_value(bs, ["Long-Term Debt", "Long Term Debt"], col_bs)
-    total_current_assets = find_row_value(bs, ["Total Current Assets"], col_bs)
-    total_current_liabilities = find_row_value(bs, ["Total Current Liabilities"], col_bs)
-    net_ppe = find_row_value(
-        bs,
-        ["Net Property Plant And Equipment", "Net Property Plant Equipment"],
-        col_bs
-    )
-    current_debt = find_row_value(bs, ["Current Debt"], col_bs)
-
-    rows.append({
-        "Ticker codes": ticker,
-        "Company Name": company_name,
-        "CCY": ccy,  # UPDATED
-        "Operating Income": operating_income,
-        "Market Cap": market_cap,
-        "Current Debt": current_debt,
-        "Long Term Debt": long_term_debt,
-        "Total Current Assets": total_current_assets,
-        "Total Current Liabilities": total_current_liabilities,
-        "Enterprise Value": None,
-        "Net Property Plant Equipment": net_ppe,
-        "Earning Yield": None,
-        "Return on Capital": None,
-    })
-
-df = pd.DataFrame(
-    rows,
-    columns=[
-        "Ticker codes",
-        "Company Name",
-        "CCY",  # UPDATED
-        "Operating Income",
-        "Market Cap",
-        "Current Debt",
-        "Long Term Debt",
-        "Total Current Assets",
-        "Total Current Liabilities",
-        "Enterprise Value",
-        "Net Property Plant Equipment",
-        "Earning Yield",
-        "Return on Capital",
-    ],
-)
-
-# UPDATED (Step 1-5): calculations for Enterprise Value, Earning Yield, Return on Capital
-# Step 2: fill empty numeric cells with 0 to avoid calculation issues
-_numeric_cols = [
-    "Operating Income",
-    "Market Cap",
-    "Current Debt",
-    "Long Term Debt",
-    "Total Current Assets",
-    "Total Current Liabilities",
-    "Net Property Plant Equipment",
-]
-
-df[_numeric_cols] = df[_numeric_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
-
-# Step 3: Enterprise Value = (Market Cap + Current Debt + Long Term Debt) - (Total Current Assets - Total Current Liabilities)
-df["Enterprise Value"] = (
-    (df["Market Cap"] + df["Current Debt"] + df["Long Term Debt"]) -
-    (df["Total Current Assets"] - df["Total Current Liabilities"])
-)
-
-# Step 4: Earning Yield = Operating Income / Enterprise Value
-_ev_denom = df["Enterprise Value"].replace(0, pd.NA)
-df["Earning Yield"] = (df["Operating Income"] / _ev_denom).fillna(0)
-
-# Step 5: Return on Capital = Operating Income / (Net PPE + (Total Current Assets - Total Current Liabilities))
-_roc_denom = (
-    df["Net Property Plant Equipment"] +
-    (df["Total Current Assets"] - df["Total Current Liabilities"])
-).replace(0, pd.NA)
-
-df["Return on Capital"] = (df["Operating Income"] / _roc_denom).fillna(0)
-
-df.to_excel(OUTPUT_PATH, index=False)
-print(f"Saved output to: {OUTPUT_PATH}")
+import numpy as np
+import os
+import pandas as pd
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+# ---------- Helpers ----------
+def extract_ticker_from_filename(name: str) -> str:
+    m = re.search(r"TIKR\s*-\s*([A-Z0-9]+)\s*-\s*Financials", name, flags=re.IGNORECASE)
+    if not m:
+        raise ValueError(f"Could not extract ticker from filename: {name}")
+    return m.group(1).upper()
+
+# UPDATED: Some TIKR filenames end with a 3-letter currency code, e.g. '-USD.xlsx' or '-CNY.xlsx'
+def extract_ccy_from_filename(name: str) -> str | None:
+    m = re.search(
+        r"[\u2010\u2011\u2012\u2013\u2014\u2212\-]\s*([A-Z]{3})\s*\.xlsx$",
+        name,
+        flags=re.IGNORECASE,
+    )
+    if not m:
+        return None
+    return m.group(1).upper()
+
+_NORM_HYPHENS_RE = re.compile(r"[\u2010\u2011\u2012\u2013\u2014\u2212\-]")  # hyphen variants
+_NORM_NONALNUM_RE = re.compile(r"[^a-z0-9]+")
+_NORM_WS_RE = re.compile(r"\s+")
+
+# Statement labels repeat across every TIKR file (and .map(_norm) calls it per cell), so cache by label
+@lru_cache(maxsize=4096)
+def _norm(s: str) -> str:
+    s = str(s).strip().lower()
+    s = _NORM_HYPHENS_RE.sub(" ", s)
+    s = _NORM_NONALNUM_RE.sub(" ", s)
+    s = _NORM_WS_RE.sub(" ", s).strip()
+    return s
+
+def pick_year_column(sheet_df: pd.DataFrame, preferred_year: int = 2025) -> tuple[int, int]:
+    header = sheet_df.iloc[0, 1:]  # row 1, col B onward
+
+    # TIKR headers are mm/dd/yy
+    dates = pd.to_datetime(header, errors="coerce", format="%m/%d/%y")
+    years = dates.dt.year.to_numpy(dtype="float64")
+
+    if np.isnan(years).all():
+        raise ValueError("No parseable date headers found in row 1 starting from column B.")
+
+    if (years == preferred_year).any():
+        chosen_year = preferred_year
+    else:
+        chosen_year = int(np.nanmax(years))
+
+    # Latest column for the chosen year; +1 because the header starts at column B
+    chosen_col = int(np.flatnonzero(years == chosen_year)[-1]) + 1
+
+    return chosen_year, chosen_col
+
+
+def find_row_value(norm_col: pd.Series, label_variants: list[str], values: np.ndarray) -> float | None:
+    # norm_col: the sheet's normalized column A
+    # values: the chosen year column, already coerced to float (NaN where not numeric)
+    variants = [_norm(v) for v in label_variants]
+
+    for v in variants:
+        hits = np.flatnonzero(norm_col.str.contains(re.escape(v)).to_numpy())
+        if hits.size:
+            val = values[hits[0]]
+            return None if np.isnan(val) else float(val)
+
+    return None
+
+# ---------- Paths (relative to this .py file) ----------
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+TIKR_DIR = SCRIPT_DIR / "TIKR"
+MARKETCAP_PATH = SCRIPT_DIR / "MarketCap" / "SGX-MarketCap.xlsx"
+OUTPUT_PATH = SCRIPT_DIR / "SGX-Magic-Formula.xlsx"
+
+if not TIKR_DIR.exists():
+    raise FileNotFoundError(f"TIKR folder not found: {TIKR_DIR}")
+
+if not MARKETCAP_PATH.exists():
+    raise FileNotFoundError(f"SGX-MarketCap.xlsx not found: {MARKETCAP_PATH}")
+
+# ---------- Load Market Cap file ----------
+mc = pd.read_excel(MARKETCAP_PATH)
+
+# Update for CCY calculation: SGD -> CCY FX rates (multiplier)
+# - Keep these rates here so you can update them easily when needed.
+SGD_TO_CCY_RATES: dict[str, float] = {
+    "MYR": 3.15,
+    "USD": 0.77,
+    "IDR": 12907.94,
+    "THB": 24.27,
+    "CNY": 5.43,
+    "EUR": 0.66,
+    "HKD": 6.00,
+}
+
+
+def market_cap_sgd_to_ccy_millions(mkt_cap_sgd: float | int | None, ccy: str | None) -> float | None:
+    """Convert a SGD market cap value to CCY (if provided) and return in millions."""
+    if mkt_cap_sgd is None:
+        return None
+
+    amt = pd.to_numeric(mkt_cap_sgd, errors="coerce")
+    if pd.isna(amt):
+        return None
+
+        # Update for CCY calculation: if CCY is empty/NaN, keep market cap in SGD.
+    if ccy is None or pd.isna(ccy) or str(ccy).strip() == "":
+        # No CCY suffix in filename (or missing CCY), keep market cap in SGD.
+        return float(amt) / 1_000_000
+
+    ccy_u = str(ccy).strip().upper()
+    if ccy_u not in SGD_TO_CCY_RATES:
+        msg = (
+            f"Update for CCY calculation: Missing SGD-> {ccy_u} rate. "
+            "Please update SGD_TO_CCY_RATES in the script."
+        )
+        print(msg)
+        raise ValueError(msg)
+
+    return (float(amt) * SGD_TO_CCY_RATES[ccy_u]) / 1_000_000
+
+ticker_col = next((c for c in mc.columns if _norm(c) in {"ticker", "tickers"}), None)
+company_col = next((c for c in mc.columns if _norm(c) in {"company name", "company"}), None)
+if ticker_col is None or company_col is None:
+    raise ValueError("Could not find required columns 'Ticker' and 'Company Name' in SGX-MarketCap.xlsx.")
+
+# UPDATED: Market cap source file changed - use the "Mkt Cap" column (instead of the last column)
+mkt_cap_col = next((c for c in mc.columns if _norm(c) in {"mkt cap", "market cap", "market capitalization"}), None)
+if mkt_cap_col is None:
+    raise ValueError("Could not find required column 'Mkt Cap' in SGX-MarketCap.xlsx.")
+
+marketcap_value_col = mkt_cap_col
+
+# Update for CCY calculation: keep Market Cap as raw SGD in the lookup.
+# Conversion to CCY (and to millions) is done per-row based on the file's CCY suffix.
+mc[marketcap_value_col] = pd.to_numeric(mc[marketcap_value_col], errors="coerce")
+mc_lookup = mc.copy()
+mc_lookup[ticker_col] = mc_lookup[ticker_col].astype(str).str.strip().str.upper()
+mc_lookup = mc_lookup.set_index(ticker_col)
+
+# One dict lookup per ticker returns both fields (first row wins for duplicated tickers)
+mc_dict = (
+    mc_lookup.loc[~mc_lookup.index.duplicated(keep="first"), [company_col, marketcap_value_col]]
+    .to_dict(orient="index")
+)
+
+# ---------- Process TIKR financial files ----------
+#tikr_files = sorted(TIKR_DIR.glob("TIKR - * - Financials (*.xlsx"))
+tikr_files = sorted(TIKR_DIR.glob("TIKR - * - Financials*.xlsx"))
+
+print("Picked up these TIKR files:") # UPDATED
+for p in tikr_files: # UPDATED
+    print(" -", p.name) # UPDATED
+
+if not tikr_files:
+    raise FileNotFoundError(f"No TIKR financial files found in: {TIKR_DIR}")
+
+def process_one(fpath: Path) -> dict:
+    """Build the output row for one TIKR workbook (mc_dict is only read here)."""
+    ticker = extract_ticker_from_filename(fpath.name)
+
+    # UPDATED: Extract optional 3-letter currency code suffix from filename (if present)
+    ccy = extract_ccy_from_filename(fpath.name)    
+    company_name = None
+    market_cap = None
+    raw_market_cap_sgd = None
+    mc_row = mc_dict.get(ticker)
+    if mc_row:
+        company_name = mc_row[company_col]
+        raw_market_cap_sgd = mc_row[marketcap_value_col]
+
+    # Update for CCY calculation: convert raw SGD market cap into the row CCY (if any), then to millions.
+    if raw_market_cap_sgd is not None:
+        market_cap = market_cap_sgd_to_ccy_millions(raw_market_cap_sgd, ccy)
+
+    # Open the workbook once and load both statements from it
+    sheets = pd.read_excel(fpath, sheet_name=["Income Statement", "Balance Sheet"], header=None)
+
+    # Income Statement
+    inc = sheets["Income Statement"]
+    _, col_inc = pick_year_column(inc, preferred_year=2025) #update the year if i want to extract past years. If cannot find, default to most recent year
+    inc_labels = inc.iloc[:, 0].astype(str).map(_norm)
+    inc_values = pd.to_numeric(inc.iloc[:, col_inc], errors="coerce").to_numpy(dtype="float64")
+    operating_income = find_row_value(inc_labels, ["Operating Income"], inc_values)
+
+    # Balance Sheet
+    bs = sheets["Balance Sheet"]
+    _, col_bs = pick_year_column(bs, preferred_year=2025) #update the year if i want to extract past years. If cannot find, default to most recent year
+
+    # Normalize the label column and coerce the value column once for every Balance Sheet lookup
+    bs_labels = bs.iloc[:, 0].astype(str).map(_norm)
+    bs_values = pd.to_numeric(bs.iloc[:, col_bs], errors="coerce").to_numpy(dtype="float64")
+
+    long_term_debt = find_row_value(bs_labels, ["Long-Term Debt", "Long Term Debt"], bs_values)
+    total_current_assets = find_row_value(bs_labels, ["Total Current Assets"], bs_values)
+    total_current_liabilities = find_row_value(bs_labels, ["Total Current Liabilities"], bs_values)
+    net_ppe = find_row_value(
+        bs_labels,
+        ["Net Property Plant And Equipment", "Net Property Plant Equipment"],
+        bs_values,
+    )
+    current_debt = find_row_value(bs_labels, ["Current Debt"], bs_values)
+
+    return {
+        "Ticker codes": ticker,
+        "Company Name": company_name,
+        "CCY": ccy,  # UPDATED
+        "Operating Income": operating_income,
+        "Market Cap": market_cap,
+        "Current Debt": current_debt,
+        "Long Term Debt": long_term_debt,
+        "Total Current Assets": total_current_assets,
+        "Total Current Liabilities": total_current_liabilities,
+        "Enterprise Value": None,
+        "Net Property Plant Equipment": net_ppe,
+        "Earning Yield": None,
+        "Return on Capital": None,
+    }
+
+# Workbooks are independent, so read them on a thread pool; map() keeps the file order
+with ThreadPoolExecutor(max_workers=min(16, (os.cpu_count() or 1) * 2)) as ex:
+    rows = list(ex.map(process_one, tikr_files))
+
+df = pd.DataFrame(
+    rows,
+    columns=[
+        "Ticker codes",
+        "Company Name",
+        "CCY",  # UPDATED
+        "Operating Income",
+        "Market Cap",
+        "Current Debt",
+        "Long Term Debt",
+        "Total Current Assets",
+        "Total Current Liabilities",
+        "Enterprise Value",
+        "Net Property Plant Equipment",
+        "Earning Yield",
+        "Return on Capital",
+    ],
+)
+
+# UPDATED (Step 1-5): calculations for Enterprise Value, Earning Yield, Return on Capital
+# Step 2: fill empty numeric cells with 0 to avoid calculation issues
+_numeric_cols = [
+    "Operating Income",
+    "Market Cap",
+    "Current Debt",
+    "Long Term Debt",
+    "Total Current Assets",
+    "Total Current Liabilities",
+    "Net Property Plant Equipment",
+]
+
+# Rows only hold floats or None here, so one bulk cast replaces the per-column to_numeric
+df[_numeric_cols] = df[_numeric_cols].astype("float64").fillna(0)
+
+# Step 3: Enterprise Value = (Market Cap + Current Debt + Long Term Debt) - (Total Current Assets - Total Current Liabilities)
+df["Enterprise Value"] = (
+    (df["Market Cap"] + df["Current Debt"] + df["Long Term Debt"]) -
+    (df["Total Current Assets"] - df["Total Current Liabilities"])
+)
+
+# Step 4: Earning Yield = Operating Income / Enterprise Value
+_ev_denom = df["Enterprise Value"].replace(0, pd.NA)
+df["Earning Yield"] = (df["Operating Income"] / _ev_denom).fillna(0)
+
+# Step 5: Return on Capital = Operating Income / (Net PPE + (Total Current Assets - Total Current Liabilities))
+_roc_denom = (
+    df["Net Property Plant Equipment"] +
+    (df["Total Current Assets"] - df["Total Current Liabilities"])
+).replace(0, pd.NA)
+
+df["Return on Capital"] = (df["Operating Income"] / _roc_denom).fillna(0)
+
+df.to_excel(OUTPUT_PATH, index=False)
+print(f"Saved output to: {OUTPUT_PATH}")
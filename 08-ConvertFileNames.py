@@ -1,62 +1,71 @@
-'''
-The purpose of this code is to change the file name. For filename without any currency code, update the file name with "CNY"
-As for file name that ends with HKD, remove it.
-'''
-
-from pathlib import Path
-import re
-
-FOLDER = Path("MagicFormula\TIKR")   # change if needed
-DRY_RUN = False                # set to False to actually rename
-
-# Matches a 3-letter currency code at the very end of the stem, like "-HKD"
-CURRENCY_AT_END_RE = re.compile(r"-[A-Za-z]{3}$")
-
-def safe_rename(src: Path, dst: Path) -> None:
-    """Rename src -> dst, avoiding collisions by appending (1), (2), ... if needed."""
-    if src == dst:
-        return
-
-    candidate = dst
-    i = 1
-    while candidate.exists():
-        candidate = dst.with_name(f"{dst.stem} ({i}){dst.suffix}")
-        i += 1
-
-    if DRY_RUN:
-        print(f"[DRY RUN] {src.name}  ->  {candidate.name}")
-    else:
-        src.rename(candidate)
-        print(f"Renamed: {src.name}  ->  {candidate.name}")
-
-def main():
-    if not FOLDER.exists() or not FOLDER.is_dir():
-        raise FileNotFoundError(f"Folder not found: {FOLDER.resolve()}")
-
-    for f in FOLDER.iterdir():
-        if not f.is_file():
-            continue
-        if f.suffix.lower() != ".xlsx":
-            continue
-
-        stem = f.stem  # filename without extension
-
-        # Rule 1: remove trailing "-HKD"
-        if stem.lower().endswith("-hkd"):
-            new_stem = stem[:-4]  # remove last 4 chars: "-HKD"
-            new_name = f"{new_stem}.xlsx"
-            safe_rename(f, f.with_name(new_name))
-            continue
-
-        # Rule 2: if no trailing "-CCC" currency, append "-CNY"
-        if CURRENCY_AT_END_RE.search(stem) is None:
-            new_name = f"{stem}-CNY.xlsx"
-            safe_rename(f, f.with_name(new_name))
-            continue
-
-        # Otherwise, leave as-is
-        if DRY_RUN:
-            print(f"[DRY RUN] (no change) {f.name}")
-
-if __name__ == "__main__":
-    main()
+'''
+The purpose of this code is to change the file name. For filename without any currency code, update the file name with "CNY"
+As for file name that ends with HKD, remove it.
+'''
+
+import os
+from pathlib import Path
+
+FOLDER = Path("MagicFormula\TIKR")   # change if needed
+DRY_RUN = False                # set to False to actually rename
+
+def safe_rename(src: str, dst: str, existing: set[str]) -> None:
+    """Rename src -> dst, avoiding collisions by appending (1), (2), ... if needed."""
+    if src == dst:
+        return
+
+    # existing holds the folder's names (os.path.normcase'd), so collisions are set probes, not stats
+    folder, dst_name = os.path.split(dst)
+    root, ext = os.path.splitext(dst_name)
+    candidate_name = dst_name
+    i = 1
+    while os.path.normcase(candidate_name) in existing:
+        candidate_name = f"{root} ({i}){ext}"
+        i += 1
+
+    src_name = os.path.basename(src)
+    if DRY_RUN:
+        print(f"[DRY RUN] {src_name}  ->  {candidate_name}")
+    else:
+        os.rename(src, os.path.join(folder, candidate_name))
+        existing.discard(os.path.normcase(src_name))
+        existing.add(os.path.normcase(candidate_name))
+        print(f"Renamed: {src_name}  ->  {candidate_name}")
+
+def main():
+    if not FOLDER.exists() or not FOLDER.is_dir():
+        raise FileNotFoundError(f"Folder not found: {FOLDER.resolve()}")
+
+    # scandir entries carry the file type from the directory read, so no extra stat per file.
+    # The listing is taken up front so renames below do not feed back into the loop.
+    with os.scandir(FOLDER) as it:
+        all_entries = list(it)
+
+    # Every name already in the folder (files and sub-folders), kept in sync by safe_rename
+    existing = {os.path.normcase(e.name) for e in all_entries}
+    entries = [e for e in all_entries if e.is_file() and os.path.splitext(e.name)[1].lower() == ".xlsx"]
+
+    for entry in entries:
+        stem = entry.name[:-5]  # filename without extension
+
+        # Rule 1: remove trailing "-HKD"
+        if stem.lower().endswith("-hkd"):
+            new_stem = stem[:-4]  # remove last 4 chars: "-HKD"
+            new_name = f"{new_stem}.xlsx"
+            safe_rename(entry.path, os.path.join(FOLDER, new_name), existing)
+            continue
+
+        # Rule 2: if no trailing "-CCC" currency, append "-CNY"
+        # (plain string check for a 3-letter code at the very end of the stem, like "-HKD")
+        ccy = stem[-3:]
+        if not (len(stem) >= 4 and stem[-4] == "-" and ccy.isascii() and ccy.isalpha()):
+            new_name = f"{stem}-CNY.xlsx"
+            safe_rename(entry.path, os.path.join(FOLDER, new_name), existing)
+            continue
+
+        # Otherwise, leave as-is
+        if DRY_RUN:
+            print(f"[DRY RUN] (no change) {entry.name}")
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,77 @@
-"""
-This code is to update the file names from TIKR - 590 - Financials (3.31.06 - 3.31.25)-HKD..xlsx to TIKR - 590 - Financials (3.31.06 - 3.31.25)-HKD.xlsx 
-When i save the file name, i save with additional "." which will cause renaming of file name with ccy with errors.
-Run this code first before running the ConvertFileNames.py
-"""
-
-from pathlib import Path
-import re
-
-FOLDER = Path("MagicFormula\TIKR")   # change if needed
-DRY_RUN = False                # set to False to actually rename
-
-# Only fix the specific pattern "-HKD..xlsx" (or any currency "-XXX..xlsx")
-# so files like "-HKD.xlsx" remain unchanged.
-EXTRA_DOT_AFTER_CCY_RE = re.compile(r"(-[A-Za-z]{3})\.\.(xlsx)$", flags=re.IGNORECASE)
-
-def safe_rename(src: Path, dst: Path) -> None:
-    if src == dst:
-        return
-
-    candidate = dst
-    i = 1
-    while candidate.exists():
-        candidate = dst.with_name(f"{dst.stem} ({i}){dst.suffix}")
-        i += 1
-
-    if DRY_RUN:
-        print(f"[DRY RUN] {src.name}  ->  {candidate.name}")
-    else:
-        src.rename(candidate)
-        print(f"Renamed: {src.name}  ->  {candidate.name}")
-
-def main():
-    if not FOLDER.exists() or not FOLDER.is_dir():
-        raise FileNotFoundError(f"Folder not found: {FOLDER.resolve()}")
-
-    for f in FOLDER.iterdir():
-        if not f.is_file():
-            continue
-        if f.suffix.lower() != ".xlsx":
-            continue
-
-        old_name = f.name
-
-        # Turn "-HKD..xlsx" into "-HKD.xlsx"
-        new_name = EXTRA_DOT_AFTER_CCY_RE.sub(r"\1.\2", old_name)
-
-        if new_name != old_name:
-            safe_rename(f, f.with_name(new_name))
-        else:
-            if DRY_RUN:
-                print(f"[DRY RUN] (no change) {old_name}")
-
-if __name__ == "__main__":
-    main()
+"""
+This code is to update the file names from TIKR - 590 - Financials (3.31.06 - 3.31.25)-HKD..xlsx to TIKR - 590 - Financials (3.31.06 - 3.31.25)-HKD.xlsx 
+When i save the file name, i save with additional "." which will cause renaming of file name with ccy with errors.
+Run this code first before running the ConvertFileNames.py
+"""
+
+import os
+from pathlib import Path
+
+FOLDER = Path("MagicFormula\TIKR")   # change if needed
+DRY_RUN = False                # set to False to actually rename
+
+def has_extra_dot_after_ccy(name: str) -> bool:
+    """
+    Only match the specific pattern "-HKD..xlsx" (or any currency "-XXX..xlsx")
+    so files like "-HKD.xlsx" remain unchanged.
+    """
+    ccy = name[-9:-6]
+    return (
+        len(name) >= 10
+        and name[-10] == "-"
+        and ccy.isascii()
+        and ccy.isalpha()
+        and name[-6:].lower() == "..xlsx"
+    )
+
+def safe_rename(src: str, dst: str, existing: set[str]) -> None:
+    if src == dst:
+        return
+
+    # existing holds the folder's names (os.path.normcase'd), so collisions are set probes, not stats
+    folder, dst_name = os.path.split(dst)
+    root, ext = os.path.splitext(dst_name)
+    candidate_name = dst_name
+    i = 1
+    while os.path.normcase(candidate_name) in existing:
+        candidate_name = f"{root} ({i}){ext}"
+        i += 1
+
+    src_name = os.path.basename(src)
+    if DRY_RUN:
+        print(f"[DRY RUN] {src_name}  ->  {candidate_name}")
+    else:
+        os.rename(src, os.path.join(folder, candidate_name))
+        existing.discard(os.path.normcase(src_name))
+        existing.add(os.path.normcase(candidate_name))
+        print(f"Renamed: {src_name}  ->  {candidate_name}")
+
+def main():
+    if not FOLDER.exists() or not FOLDER.is_dir():
+        raise FileNotFoundError(f"Folder not found: {FOLDER.resolve()}")
+
+    # scandir entries carry the file type from the directory read, so no extra stat per file.
+    # The listing is taken up front so renames below do not feed back into the loop.
+    with os.scandir(FOLDER) as it:
+        all_entries = list(it)
+
+    # Every name already in the folder (files and sub-folders), kept in sync by safe_rename
+    existing = {os.path.normcase(e.name) for e in all_entries}
+    entries = [e for e in all_entries if e.is_file() and os.path.splitext(e.name)[1].lower() == ".xlsx"]
+
+    for entry in entries:
+        old_name = entry.name
+
+        # Turn "-HKD..xlsx" into "-HKD.xlsx" (drop one dot, keep the extension's case)
+        new_name = old_name
+        if has_extra_dot_after_ccy(old_name):
+            new_name = old_name[:-6] + old_name[-5:]
+
+        if new_name != old_name:
+            safe_rename(entry.path, os.path.join(FOLDER, new_name), existing)
+        else:
+            if DRY_RUN:
+                print(f"[DRY RUN] (no change) {old_name}")
+
+if __name__ == "__main__":
+    main()
@@ -1,223 +1,198 @@
-'''
-
-This script is used to parse the dividends text from the PDF file and save the results to an Excel file.
-uv init to create pyproject.toml, uv.lock and .venv/
-Install packages with uv and not pip. uv add pdfplumber pandas
-To run the scripy, uv run python ParseDividendsText.py
-'''
-
-
-import pdfplumber
-import pandas as pd
-import re
-
-# 1. Set your paths
-#pdf_path = r"Nov 2025.pdf"
-#pdf_path = r"Sep 2025.pdf"
-pdf_path = r"Aug 2025.pdf"
-#pdf_path = r"Oct 2025.pdf"
-#pdf_path = r"07-Jul 2025.pdf"
-#pdf_path = r"06-Jun 2025.pdf"
-#pdf_path = r"03-Mar 2025.pdf"
-
-output_excel = r"CDP_transaction_details.xlsx"
-
-# 2. Helper: parse one line of transaction text
-#    We only keep Date, Description and amount
-
-def parse_transaction_line(line: str):
-    """
-    Expected pattern (examples):
-      '14/11/2025 SGX Interim Cash Dividend - 600 units @ SGD 0.1075 64.50'
-      '24/11/2025 DBS Interim Cash Dividend - 442 units @ SGD 0.6 265.20'
-      '28/11/2025 NETLINK NBN TR Interim Cash Dividend - 1,000 units @ SGD 0.0271 27.10'
-
-    Capture:
-      Date        -> 14/11/2025
-      Description -> SGX Interim Cash Dividend - 600 units @ SGD 0.1075
-      Amount      -> 64.50
-    """
-
-    # 1) Start with DD/MM/YYYY
-    # 2) Description must contain "Dividend"
-    # 3) Last token is Amount Paid (allow optional "-" sign)
-    m = re.match(
-    r"^(\d{2}/\d{2}/\d{4})\s+(.+(?:Dividend|Distribution).+?)\s+(-?[0-9,]+\.\d{2})\s*$",
-    line,
-    flags=re.IGNORECASE,
-)
-
-
-    if not m:
-        # Not a dividend credit row
-        return None
-    '''
-    #Debug Purposes
-    if m:
-        print("\n--- Regex Match Debug ---")
-        for i, g in enumerate(m.groups(), start=1):
-            print(f"Group {i}: {g}")
-        print("-------------------------\n")
-        '''
-
-    date_raw, description, amount_str = m.groups()
-
-    # Convert from '14/11/2025' to '14-Nov-25' (or whatever you prefer)
-    day, month_num, year_full = date_raw.split("/")
-
-    month_map = {
-        "01": "Jan", "02": "Feb", "03": "Mar", "04": "Apr",
-        "05": "May", "06": "Jun", "07": "Jul", "08": "Aug",
-        "09": "Sep", "10": "Oct", "11": "Nov", "12": "Dec",
-    }
-    mon = month_map.get(month_num, month_num)
-    year_short = year_full[-2:]   # "2025" -> "25"
-    date = f"{day}-{mon}-{year_short}"
-
-    return {
-        "Date": date,
-        "Description": description,
-        "Credit ($)": amount_str,
-    }
-
-
-# 3. Open PDF and extract the TRANSACTION DETAILS block
-CODE_TO_NAME = {
-    "CAPITA CHINA TR": "CapitaLand Retail China Trust",
-    "CAPLAND ASCOTT T": "ASCOTT RESIDENCE TRUST",
-    "CAPLAND INDIA T": "Capitaland India Trust",
-    "CAPLAND INTCOM T": "Capitaland Integrated Commercial Trust",
-    "CL ASCENDAS REIT": "Capitaland Ascendas",
-    "DBS": "DBS",
-    "FIRST REIT": "First Reits",
-    "F & N": "F&N",
-    "FRASERS CPT TR": "Frasers Centrepoint",
-    "HAW PAR": "Haw Par",
-    "KEPPEL DC REIT": "Keppel DC",
-    "MAPLETREE IND TR": "Mapletree Industrial Trust",
-    "MPLTR PAN TR": "Mapletree Pan Asia",
-    "NETLINK NBN TR": "NetLink NBN Trust",
-    "OCBC BANK": "OCBC",
-    "PARKWAYLIFE REIT": "Parkway Life REITS",
-    "RAFFLES MEDICAL": "Raffles Medical",
-    "SGX": "SGX",
-    "STI ETF": "STI ETF",
-    "THAIBEV": "Thai Beverage",
-    "VICOM LTD": "Vicom",
-    "HONGKONG LAND": "Hong Kong Land",
-    "MANULIFEREIT USD": "Manulife US Reits",
-}
-# This is to update the description to the string that i prefers
-def clean_description(raw_desc: str) -> str:
-    """Strip fixed prefix and map the leading code to a full name.
-
-    Examples:
-      'PARKWAYLIFE REIT Interim Cash Dividend - 600 units @ SGD 0.0177'
-        -> 'Parkway Life REITS'
-
-      'CAPITA CHINA TR Final Cash Dividend - 6,800 units @ SGD 0.0264'
-        -> 'CapitaLand Retail China Trust'
-    """
-    # Remove prefix and trim
-    desc = raw_desc.replace("CR DIVIDENDS FOR", "").strip()
-
-    upper_desc = desc.upper()
-
-    # Match on leading code from CODE_TO_NAME
-    for code, full_name in CODE_TO_NAME.items():
-        if upper_desc.startswith(code.upper()):
-            return full_name
-
-    # If no match, keep the cleaned original text
-    return desc
-
-rows = []
-
-with pdfplumber.open(pdf_path) as pdf:
-    
-    for page in pdf.pages:
-        text = page.extract_text() or ""
-        #print("Printing text")
-        #print(f"text:{text}")
-        
-        if "Cash Transaction" not in text:
-            continue
-
-        # Keep only the part between "TRANSACTION DETAILS" and
-        # the next section header "SECURITY INVESTMENT ACTIVITY"
-        section = text.split("Cash Transaction", 1)[1]
-        
-        if "Your Securities Account is Linked To" in section:
-            section = section.split("Your Securities Account is Linked To", 1)[0]
-
-        for raw_line in section.splitlines():
-            line = raw_line.strip()
-            #print(f"Line:{line}\n")
-            #print(f"{line}\n")
-
-            # Pass every line in the TRANSACTION DETAILS section to the parser.
-            # The parser itself will decide if the line is a valid transaction row.
-            record = parse_transaction_line(line)
-            if record:
-                rows.append(record)
-                
-# Clean Description field before saving
-# 1) Strip the fixed prefix 'CR DIVIDENDS FOR'
-# 2) Map issuer code at the start of the description to full name via lookup table
-for r in rows:
-    original_desc = r["Description"]
-
-    # Use helper to produce a clean security name
-    cleaned_desc = clean_description(original_desc)
-    r["Description"] = cleaned_desc
-
-    # New fields for Excel
-    r["Ticker"] = ""              # empty for now
-    r["Year"] = "2025"            # fixed year
-    r["Currency"] = "SGD"         # fixed currency
-    r["Net Amount"] = r["Credit ($)"]  # same as Credit ($)
-
-#print(f"Rows after cleaning:{rows}\n")
-
-# 4. Save to Excel (Date, Description, Credit only)
-# df = pd.DataFrame(rows, columns=["Date", "Description", "Credit ($)"])
-df = pd.DataFrame(rows)[["Description", "Ticker", "Year", "Date", "Currency", "Credit ($)", "Net Amount"]]
-
-
-# 5. Build summarized DataFrame (Sheet2)
-# Convert Credit ($) and Net Amount to numeric so they can be summed
-df_summary = df.copy()
-
-for col in ["Credit ($)", "Net Amount"]:
-    # Remove commas if any, then convert to float
-    df_summary[col] = (
-        df_summary[col]
-        .astype(str)
-        .str.replace(",", "", regex=False)
-        .astype(float)
-    )
-
-# Group by Description and other identifying fields
-# This collapses multiple payouts for the same company on the same date
-group_cols = ["Description", "Ticker", "Year", "Date", "Currency"]
-
-[df_summary] = [
-    df_summary
-    .groupby(group_cols, as_index=False)
-    .agg({
-        "Credit ($)": "sum",
-        "Net Amount": "sum",
-    })
-]
-
-# Optional: round to 2 decimal places
-df_summary["Credit ($)"] = df_summary["Credit ($)"].round(2)
-df_summary["Net Amount"] = df_summary["Net Amount"].round(2)
-
-# 6. Save to Excel with two sheets: Sheet1 (detailed), Sheet2 (summarized)
-with pd.ExcelWriter(output_excel) as writer:
-    df.to_excel(writer, sheet_name="Sheet1", index=False)
-    df_summary.to_excel(writer, sheet_name="Sheet2", index=False)
-
-print(f"Extracted {len(df)} detailed rows to {output_excel} (Sheet1)")
-print(f"Summarized to {len(df_summary)} rows in Sheet2")
+'''
+
+This script is used to parse the dividends text from the PDF file and save the results to an Excel file.
+uv init to create pyproject.toml, uv.lock and .venv/
+Install packages with uv and not pip. uv add pdfplumber pandas xlsxwriter
+To run the scripy, uv run python ParseDividendsText.py
+'''
+
+
+import pdfplumber
+import pandas as pd
+import re
+from pathlib import Path
+from parsers import DIVIDEND_PREFIX, Statement, collect, write_outputs
+
+# 1. Set your paths
+# Every statement matching pdf_glob in this folder is parsed, one worker process per PDF.
+# Single files used before:
+#pdf_path = r"Nov 2025.pdf"
+#pdf_path = r"Sep 2025.pdf"
+#pdf_path = r"Aug 2025.pdf"
+#pdf_path = r"Oct 2025.pdf"
+#pdf_path = r"07-Jul 2025.pdf"
+#pdf_path = r"06-Jun 2025.pdf"
+#pdf_path = r"03-Mar 2025.pdf"
+
+pdf_glob = "*[A-Z][a-z][a-z] 20??.pdf"   # e.g. "Aug 2025.pdf", "07-Jul 2025.pdf"
+output_excel = r"CDP_transaction_details.xlsx"
+
+# Statement year from the "Mon YYYY.pdf" file name, so a batch spanning years keeps each file's Year
+FILE_YEAR_RE = re.compile(r" (20\d{2})\.pdf$", re.IGNORECASE)
+
+# 2. Helper: turn one matched transaction line into a row
+#    We only keep Date, Description and amount
+
+# Dividend/distribution row: DD/MM/YYYY, description, amount.
+# MULTILINE so one finditer walks the whole section; [^\S\n] is whitespace that
+# never crosses a line break, so each match stays within one (unstripped) line.
+TXN_RE = re.compile(
+    r"^[^\S\n]*(\d{2}/\d{2}/\d{4})[^\S\n]+(.+(?:Dividend|Distribution).+?)[^\S\n]+(-?[0-9,]+\.\d{2})[^\S\n]*$",
+    flags=re.IGNORECASE | re.MULTILINE,
+)
+
+# Month number -> abbreviation (index 0 unused)
+MONTHS = ("", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+def parse_transaction_match(m: re.Match):
+    """
+    Build one row tuple from a TXN_RE match.
+
+    Expected pattern (examples):
+      '14/11/2025 SGX Interim Cash Dividend - 600 units @ SGD 0.1075 64.50'
+      '24/11/2025 DBS Interim Cash Dividend - 442 units @ SGD 0.6 265.20'
+      '28/11/2025 NETLINK NBN TR Interim Cash Dividend - 1,000 units @ SGD 0.0271 27.10'
+
+    Capture:
+      Date        -> 14/11/2025
+      Description -> SGX Interim Cash Dividend - 600 units @ SGD 0.1075
+      Amount      -> 64.50
+    """
+
+    # TXN_RE:
+    # 1) Start with DD/MM/YYYY
+    # 2) Description must contain "Dividend"
+    # 3) Last token is Amount Paid (allow optional "-" sign)
+    '''
+    #Debug Purposes
+    if m:
+        print("\n--- Regex Match Debug ---")
+        for i, g in enumerate(m.groups(), start=1):
+            print(f"Group {i}: {g}")
+        print("-------------------------\n")
+        '''
+
+    date_raw, description, amount_str = m.groups()
+
+    # Convert from '14/11/2025' to '14-Nov-25' (or whatever you prefer)
+    # TXN_RE guarantees DD/MM/YYYY, so fixed slices replace split("/")
+    month_num = int(date_raw[3:5])
+    mon = MONTHS[month_num] if 1 <= month_num <= 12 else date_raw[3:5]
+    date = f"{date_raw[:2]}-{mon}-{date_raw[8:10]}"   # "2025" -> "25"
+
+    # (Date, Description, Credit ($)); the credit is numeric from the start, commas removed
+    return date, description, float(amount_str.replace(",", ""))
+
+
+# 3. Open PDF and extract the TRANSACTION DETAILS block
+CODE_TO_NAME = {
+    "CAPITA CHINA TR": "CapitaLand Retail China Trust",
+    "CAPLAND ASCOTT T": "ASCOTT RESIDENCE TRUST",
+    "CAPLAND INDIA T": "Capitaland India Trust",
+    "CAPLAND INTCOM T": "Capitaland Integrated Commercial Trust",
+    "CL ASCENDAS REIT": "Capitaland Ascendas",
+    "DBS": "DBS",
+    "FIRST REIT": "First Reits",
+    "F & N": "F&N",
+    "FRASERS CPT TR": "Frasers Centrepoint",
+    "HAW PAR": "Haw Par",
+    "KEPPEL DC REIT": "Keppel DC",
+    "MAPLETREE IND TR": "Mapletree Industrial Trust",
+    "MPLTR PAN TR": "Mapletree Pan Asia",
+    "NETLINK NBN TR": "NetLink NBN Trust",
+    "OCBC BANK": "OCBC",
+    "PARKWAYLIFE REIT": "Parkway Life REITS",
+    "RAFFLES MEDICAL": "Raffles Medical",
+    "SGX": "SGX",
+    "STI ETF": "STI ETF",
+    "THAIBEV": "Thai Beverage",
+    "VICOM LTD": "Vicom",
+    "HONGKONG LAND": "Hong Kong Land",
+    "MANULIFEREIT USD": "Manulife US Reits",
+}
+# Upper-cased lookup and leading-code matcher, built once at import instead of per row/call.
+# Longest codes come first so a code that is a prefix of a longer one can never shadow it.
+CODE_TO_NAME_UPPER = {code.upper(): full_name for code, full_name in CODE_TO_NAME.items()}
+_SORTED_UPPER_CODES = sorted(CODE_TO_NAME_UPPER, key=len, reverse=True)
+_CODE_PREFIX_RE = re.compile("^(" + "|".join(re.escape(code) for code in _SORTED_UPPER_CODES) + ")", re.IGNORECASE)
+
+# This is to update the description to the string that i prefers
+def clean_descriptions(raw_desc: pd.Series) -> pd.Series:
+    """Strip fixed prefix and map the leading code to a full name, for the whole column at once.
+
+    Examples:
+      'PARKWAYLIFE REIT Interim Cash Dividend - 600 units @ SGD 0.0177'
+        -> 'Parkway Life REITS'
+
+      'CAPITA CHINA TR Final Cash Dividend - 6,800 units @ SGD 0.0264'
+        -> 'CapitaLand Retail China Trust'
+    """
+    # The same issuer description repeats month after month, so only the distinct
+    # values are cleaned and the results are spread back to every row
+    labels, uniques = pd.factorize(raw_desc)
+
+    # Remove prefix and trim
+    desc = pd.Series(uniques, dtype=raw_desc.dtype).str.replace(DIVIDEND_PREFIX, "", regex=False).str.strip()
+
+    # Match on leading code from CODE_TO_NAME (case-insensitive)
+    codes = desc.str.extract(_CODE_PREFIX_RE, expand=False).str.upper()
+
+    # If no match, keep the cleaned original text
+    cleaned = codes.map(CODE_TO_NAME_UPPER).fillna(desc)
+    return cleaned.take(labels).set_axis(raw_desc.index)
+
+def process_pdf(pdf_path: Path) -> pd.DataFrame:
+    """Parse one statement PDF into its raw transaction rows, tagged with the statement's Year."""
+    m_year = FILE_YEAR_RE.search(pdf_path.name)
+    if not m_year:
+        print(f"[SKIP] No year in file name: {pdf_path}")
+        return pd.DataFrame(columns=["Date", "Description", "Credit ($)", "Year"])
+
+    # One list per column, filled straight from the matches (no per-row dict to transpose)
+    dates, descriptions, credits = [], [], []
+
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            page.close()  # only the text is used, so release the page's parsed layout now
+            #print("Printing text")
+            #print(f"text:{text}")
+        
+            # Keep only the part between "TRANSACTION DETAILS" and
+            # the next section header "SECURITY INVESTMENT ACTIVITY"
+            # (partition cuts at the first marker without building a list of pieces;
+            # a missing end marker leaves the section running to the end of the page)
+            _, found, section = text.partition("Cash Transaction")
+            if not found:
+                continue
+            section = section.partition("Your Securities Account is Linked To")[0]
+
+            # Cheap pre-check: every row starts with a DD/MM/YYYY date, so a section
+            # without any "/" cannot hold one and skips the regex scan
+            if "/" not in section:
+                continue
+
+            # One finditer over the TRANSACTION DETAILS section; TXN_RE only matches
+            # valid transaction rows, so no per-line loop, strip or parse call is needed.
+            for m in TXN_RE.finditer(section):
+                date, description, credit = parse_transaction_match(m)
+                dates.append(date)
+                descriptions.append(description)
+                credits.append(credit)
+
+    return pd.DataFrame({"Date": dates, "Description": descriptions, "Credit ($)": credits, "Year": m_year.group(1)})
+
+
+# Parse every statement in parallel (map keeps the file order) and stack the rows;
+# the guard keeps worker imports (spawned on Windows) from re-running the batch.
+if __name__ == "__main__":
+    # 4. Collect, clean and save (Sheet1 detailed, Sheet2 summarized) via the shared driver in parsers.py
+    statement = Statement(
+        pdf_glob=pdf_glob,
+        output_excel=output_excel,
+        process_pdf=process_pdf,
+        clean_descriptions=clean_descriptions,
+    )
+    df = collect(statement)
+
+    write_outputs(df, statement.output_excel)
@@ -1,234 +1,201 @@
-'''
-
-This script is used to parse the dividends text from the PDF file and save the results to an Excel file.
-uv init to create pyproject.toml, uv.lock and .venv/
-Install packages with uv and not pip. uv add pdfplumber pandas
-To run the scripy, uv run python ParseDividendsText.py
-'''
-
-
-import pdfplumber
-import pandas as pd
-import re
-
-# 1. Set your paths
-#pdf_path = r"1Page.pdf"
-pdf_path = r"Statement-28112025M2201962-s.pdf"
-#pdf_path = r"06-SUPPLEMENTARY RETIREMENT SCHEME-0171-Jun-24.pdf"
-#pdf_path = r"07-SUPPLEMENTARY RETIREMENT SCHEME-0171-Jul-25.pdf"
-output_excel = r"foreign_transaction_details.xlsx"
-
-# 2. Helper: parse one line of transaction text
-#    We only keep Date, Description and Credit amount
-
-def parse_transaction_line(line: str):
-    """
-    Parse a single transaction line for:
-
-      - 'CR Note W.E.F ...'
-      - 'DR Note HANDLING ...'
-
-    Examples:
-      '19/11/2025 CRC7789419 CR Note W.E.F 22 MAY 31.07 31.07'
-      '19/11/2025 DRC7789419 DR Note HANDLING 4.20 26.87'
-      '03/11/2025 CRC7780886 CR Note W.E.F 22 MAY 1,000.00 1,000.00'
-      '03/11/2025 DRC7780886 DR Note HANDLING CHARGES-HEIM 17.71 982.29'
-      '11/11/2025 CRC7784882 CR Note W.E.F 22 MAY 48.64 48.64'
-      '11/11/2025 DRC7784882 DR Note HANDLING 3.18 45.46'
-
-    Any other 'Note ...' lines (for example 'Note INTEREST CREDIT BIL')
-    are ignored.
-    """
-
-    # Hard filter so we never pick up 'Note INTEREST CREDIT BIL' etc.
-    if "CR Note W.E.F" not in line and "DR Note HANDLING" not in line:
-        return None
-
-    m = re.match(
-        r"^"
-        r"(\d{2}/\d{2}/\d{4})"      # 1: date in DD/MM/YYYY
-        r"\s+([A-Z0-9]+)"           # 2: reference like CRC7789419 / DRC7780886
-        r"\s+(CR|DR)"               # 3: CR/DR indicator
-        r"\s+Note\s+(.+?)"          # 4: free text after 'Note ' up to the amounts
-        r"\s+([0-9,]+\.\d{2})"      # 5: amount
-        r"\s+([0-9,]+\.\d{2})"      # 6: balance
-        r"\s*$",
-        line,
-    )
-
-    if not m:
-        # Line did not match the strict pattern
-        return None
-
-    date_str, ref_no, crdr_flag, note_suffix, amount_str, balance_str = m.groups()
-
-    # Build a readable description, but you can tweak this
-    description = f"{crdr_flag} Note {note_suffix}"
-
-    # Keep the keys your downstream code expects
-    return {
-        "Date": date_str,
-        "Description": description,
-        "Credit ($)": amount_str,
-        # Extra fields if you want to use them later
-        "Ref": ref_no,
-        "Balance": balance_str,
-        "CRDR": crdr_flag,
-    }
-
-
-
-
-# 3. Open PDF and extract the TRANSACTION DETAILS block
-CODE_TO_NAME = {
-    "1EG0": "Nikko AM SGD Corp Bond ETF",
-    "SBIETF": "ABF SINGAPORE Bond Index",
-    "STETF": "STI ETF",
-    "1DH9": "NetLink NBN Trust",
-    "4H4M": "ASCOTT RESIDENCE TRUST",
-    "92FC": "Vicom",
-    "ASCEND": "Capitaland India Trust",
-    "CMT": "Capitaland Integrated Commercial Trust",
-    "CRCT": "CapitaLand Retail China Trust",
-    "F-LITR": "Frasers Logistics Commerical",
-    "HAWP": "Haw Par",
-    "KDCRET": "Keppel DC",
-    "MCT": "Mapletree Pan Asia",
-    "MITR": "Mapletree Industrial Trust",
-    "OCBCBK": "OCBC",
-    "PKREIT": "Parkway Life REITS",
-    "RMEDIC": "Raffles Medical",
-    "SGX": "SGX",
-    "STEL": "Singtel",
-}
-rows = []
-
-start_marker = "S t a t e m e n t O f A c c o u n t"
-end_marker   = "C u s t o d y S t a t e m e n t"
-
-with pdfplumber.open(pdf_path) as pdf:
-    # 1) Concatenate text from all pages
-    all_text = ""
-    for page in pdf.pages:
-        page_text = page.extract_text() or ""
-        all_text += page_text + "\n"
-
-#print(all_text)
-
-# 2) Cut from "Statement Of Account" to "Custody Statement"
-if start_marker not in all_text:
-    raise ValueError(f"Start marker '{start_marker}' not found in PDF text")
-
-section = all_text.split(start_marker, 1)[1]
-
-if end_marker in section:
-    section = section.split(end_marker, 1)[0]
-else:
-    # Optional: warn if end marker missing instead of raising
-    print(f"Warning: end marker '{end_marker}' not found, using rest of document")
-
-#print(section)
-
-# 3) Now parse only the lines inside this section,
-#    and stitch short non-date lines onto the previous description.
-date_re = re.compile(r"^\d{2}/\d{2}/\d{4}\b")
-
-lines = [l.strip() for l in section.splitlines()]
-i = 0
-while i < len(lines):
-    line = lines[i]
-
-    # Only attempt parsing for lines that start with a date
-    if date_re.match(line):
-        record = parse_transaction_line(line)
-        if record:
-            # Look ahead to see if the next line is a short continuation
-            if i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-
-                # Continuation rule:
-                # - next line does not start with a date
-                # - next line is not empty
-                # - next line is relatively short (e.g. ≤ 40 chars)
-                if (
-                    next_line
-                    and not date_re.match(next_line)
-                    and len(next_line) <= 40
-                ):
-                    # Append the continuation text to the description
-                    record["Description"] += " " + next_line
-                    # Skip the continuation line in the main loop
-                    i += 1
-
-            rows.append(record)
-
-    # Move to the next line
-    i += 1
-
-
-                
-#print(f"Rows before cleaning:{rows}\n")
-
-# Clean Description field before saving
-# 1) Strip the fixed prefix 'CR DIVIDENDS FOR'
-# 2) Map short codes (92FC, HAWP, etc.) to full names via lookup table
-for r in rows:
-    desc = r["Description"]
-
-    # Remove prefix and trim
-    desc = desc.replace("CR DIVIDENDS FOR", "").strip()
-
-    # Map short code to full name if available
-    full_name = CODE_TO_NAME.get(desc, desc)
-    r["Description"] = full_name
-
-    # New fields for Excel
-    r["Ticker"] = ""              # empty for now
-    r["Year"] = "2024"            # fixed year
-    r["Currency"] = "SGD"         # fixed currency
-    r["Net Amount"] = r["Credit ($)"]  # same as Credit ($)
-
-#print(f"Rows after cleaning:{rows}\n")
-
-# 4. Save to Excel (Date, Description, Credit only)
-#df = pd.DataFrame(rows, columns=["Date", "Description", "Credit ($)"])
-df = pd.DataFrame(rows)[["Description", "Ticker", "Year", "Date", "Currency", "Credit ($)", "Net Amount"]]
-
-
-# 5. Build summarized DataFrame (Sheet2)
-# Convert Credit ($) and Net Amount to numeric so they can be summed
-df_summary = df.copy()
-
-for col in ["Credit ($)", "Net Amount"]:
-    # Remove commas if any, then convert to float
-    df_summary[col] = (
-        df_summary[col]
-        .astype(str)
-        .str.replace(",", "", regex=False)
-        .astype(float)
-    )
-
-# Group by Description and other identifying fields
-# This collapses multiple payouts for the same company on the same date
-group_cols = ["Description", "Ticker", "Year", "Date", "Currency"]
-
-df_summary = (
-    df_summary
-    .groupby(group_cols, as_index=False)
-    .agg({
-        "Credit ($)": "sum",
-        "Net Amount": "sum",
-    })
-)
-
-# Optional: round to 2 decimal places
-df_summary["Credit ($)"] = df_summary["Credit ($)"].round(2)
-df_summary["Net Amount"] = df_summary["Net Amount"].round(2)
-
-# 6. Save to Excel with two sheets: Sheet1 (detailed), Sheet2 (summarized)
-with pd.ExcelWriter(output_excel) as writer:
-    df.to_excel(writer, sheet_name="Sheet1", index=False)
-    df_summary.to_excel(writer, sheet_name="Sheet2", index=False)
-
-print(f"Extracted {len(df)} detailed rows to {output_excel} (Sheet1)")
-print(f"Summarized to {len(df_summary)} rows in Sheet2")
+'''
+
+This script is used to parse the dividends text from the PDF file and save the results to an Excel file.
+uv init to create pyproject.toml, uv.lock and .venv/
+Install packages with uv and not pip. uv add pdfplumber pandas xlsxwriter
+To run the scripy, uv run python ParseDividendsText.py
+'''
+
+
+import pdfplumber
+import pandas as pd
+import re
+from functools import partial
+from pathlib import Path
+from parsers import Statement, clean_exact_codes, collect, write_outputs
+
+# 1. Set your paths
+# Every statement matching pdf_glob in this folder is parsed, one worker process per PDF.
+# Single files used before:
+#pdf_path = r"1Page.pdf"
+#pdf_path = r"Statement-28112025M2201962-s.pdf"
+#pdf_path = r"06-SUPPLEMENTARY RETIREMENT SCHEME-0171-Jun-24.pdf"
+#pdf_path = r"07-SUPPLEMENTARY RETIREMENT SCHEME-0171-Jul-25.pdf"
+pdf_glob = "Statement-*.pdf"   # e.g. "Statement-28112025M2201962-s.pdf"
+output_excel = r"foreign_transaction_details.xlsx"
+
+# Statement year from the DDMMYYYY date after "Statement-", e.g. "Statement-28112025..." -> "2025",
+# so a batch spanning years keeps each file's Year
+FILE_YEAR_RE = re.compile(r"^Statement-\d{4}(\d{4})", re.IGNORECASE)
+
+# Raw row columns returned by process_pdf (also used for the empty frame of a skipped PDF)
+ROW_COLUMNS = ["Date", "Description", "Credit ($)", "Ref", "Balance", "CRDR", "Year"]
+
+# 2. Helper: turn one matched transaction line into a row
+#    We only keep Date, Description and Credit amount
+
+# Strict 'CR/DR Note' row pattern, run once over the whole section with finditer.
+# MULTILINE anchors ^/$ at each line; [^\S\n] is whitespace that never crosses a line break.
+TXN_RE = re.compile(
+    r"^[^\S\n]*"
+    r"(?=[^\n]*(?:CR Note W\.E\.F|DR Note HANDLING))"  # hard filter, so 'Note INTEREST CREDIT BIL' etc. never match
+    r"(\d{2}/\d{2}/\d{4})"             # 1: date in DD/MM/YYYY
+    r"[^\S\n]+([A-Z0-9]+)"             # 2: reference like CRC7789419 / DRC7780886
+    r"[^\S\n]+(CR|DR)"                 # 3: CR/DR indicator
+    r"[^\S\n]+Note[^\S\n]+(.+?)"       # 4: free text after 'Note ' up to the amounts
+    r"[^\S\n]+([0-9,]+\.\d{2})"        # 5: amount
+    r"[^\S\n]+([0-9,]+\.\d{2})"        # 6: balance
+    r"[^\S\n]*$"
+    # 7: optional continuation line: not a date line, not empty, <= 40 chars once stripped
+    r"(?:\n[^\S\n]*(?!\d{2}/\d{2}/\d{4}\b)(\S(?:[^\n]{0,38}\S)?)[^\S\n]*$)?",
+    flags=re.MULTILINE,
+)
+
+def parse_transaction_match(m: re.Match):
+    """
+    Build one row tuple from a TXN_RE match for:
+
+      - 'CR Note W.E.F ...'
+      - 'DR Note HANDLING ...'
+
+    Examples:
+      '19/11/2025 CRC7789419 CR Note W.E.F 22 MAY 31.07 31.07'
+      '19/11/2025 DRC7789419 DR Note HANDLING 4.20 26.87'
+      '03/11/2025 CRC7780886 CR Note W.E.F 22 MAY 1,000.00 1,000.00'
+      '03/11/2025 DRC7780886 DR Note HANDLING CHARGES-HEIM 17.71 982.29'
+      '11/11/2025 CRC7784882 CR Note W.E.F 22 MAY 48.64 48.64'
+      '11/11/2025 DRC7784882 DR Note HANDLING 3.18 45.46'
+
+    Any other 'Note ...' lines (for example 'Note INTEREST CREDIT BIL')
+    are ignored.
+    """
+
+    date_str, ref_no, crdr_flag, note_suffix, amount_str, balance_str, continuation = m.groups()
+
+    # Build a readable description, but you can tweak this
+    description = f"{crdr_flag} Note {note_suffix}"
+
+    # Append the short continuation line that wrapped below the row
+    if continuation:
+        description += " " + continuation
+
+    # (Date, Description, Credit ($), Ref, Balance, CRDR); the credit is numeric from the start,
+    # commas removed. Ref/Balance/CRDR are extra fields if you want to use them later.
+    return date_str, description, float(amount_str.replace(",", "")), ref_no, balance_str, crdr_flag
+
+
+
+
+# 3. Open PDF and extract the TRANSACTION DETAILS block
+CODE_TO_NAME = {
+    "1EG0": "Nikko AM SGD Corp Bond ETF",
+    "SBIETF": "ABF SINGAPORE Bond Index",
+    "STETF": "STI ETF",
+    "1DH9": "NetLink NBN Trust",
+    "4H4M": "ASCOTT RESIDENCE TRUST",
+    "92FC": "Vicom",
+    "ASCEND": "Capitaland India Trust",
+    "CMT": "Capitaland Integrated Commercial Trust",
+    "CRCT": "CapitaLand Retail China Trust",
+    "F-LITR": "Frasers Logistics Commerical",
+    "HAWP": "Haw Par",
+    "KDCRET": "Keppel DC",
+    "MCT": "Mapletree Pan Asia",
+    "MITR": "Mapletree Industrial Trust",
+    "OCBCBK": "OCBC",
+    "PKREIT": "Parkway Life REITS",
+    "RMEDIC": "Raffles Medical",
+    "SGX": "SGX",
+    "STEL": "Singtel",
+}
+
+start_marker = "S t a t e m e n t O f A c c o u n t"
+end_marker   = "C u s t o d y S t a t e m e n t"
+
+def process_pdf(pdf_path: Path) -> pd.DataFrame:
+    """Parse one statement PDF into its raw transaction rows, tagged with the statement's Year.
+
+    A PDF without a year in its name or without the statement section is skipped
+    (empty frame), so one odd file does not abort the whole batch.
+    """
+    m_year = FILE_YEAR_RE.search(pdf_path.name)
+    if not m_year:
+        print(f"[SKIP] No DDMMYYYY date in file name: {pdf_path}")
+        return pd.DataFrame(columns=ROW_COLUMNS)
+
+    # One list per column, filled straight from the matches (no per-row dict to transpose)
+    dates, descriptions, credits, refs, balances, crdr_flags = [], [], [], [], [], []
+
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        # 1) Concatenate text from all pages (collect then join once, instead of growing a string)
+        # Stops at the page that closes the section: nothing after "Custody Statement" is
+        # parsed, so the remaining pages are never extracted.
+        pages_text = []
+        start_seen = False
+        for page in pdf.pages:
+            page_text = page.extract_text() or ""
+            page.close()  # release the page's parsed layout once its text is read
+            pages_text.append(page_text)
+
+            if not start_seen:
+                pos = page_text.find(start_marker)
+                if pos < 0:
+                    continue
+                start_seen = True
+                page_text = page_text[pos + len(start_marker):]
+            if end_marker in page_text:
+                break
+        all_text = "\n".join(pages_text)
+
+    #print(all_text)
+
+    # 2) Cut from "Statement Of Account" to "Custody Statement"
+    # partition cuts at the first marker without building a list of pieces
+    _, found_start, section = all_text.partition(start_marker)
+    if not found_start:
+        print(f"[SKIP] Start marker '{start_marker}' not found in: {pdf_path}")
+        return pd.DataFrame(columns=ROW_COLUMNS)
+
+    section, found_end, _ = section.partition(end_marker)
+    if not found_end:
+        # Optional: warn if end marker missing instead of raising
+        print(f"Warning: end marker '{end_marker}' not found in {pdf_path}, using rest of document")
+
+    #print(section)
+
+    # 3) Now parse only the lines inside this section,
+    #    and stitch short non-date lines onto the previous description.
+    #    TXN_RE does both in one finditer pass over the section.
+    for m in TXN_RE.finditer(section):
+        date, description, credit, ref_no, balance, crdr_flag = parse_transaction_match(m)
+        dates.append(date)
+        descriptions.append(description)
+        credits.append(credit)
+        refs.append(ref_no)
+        balances.append(balance)
+        crdr_flags.append(crdr_flag)
+
+    return pd.DataFrame({
+        "Date": dates,
+        "Description": descriptions,
+        "Credit ($)": credits,
+        "Ref": refs,
+        "Balance": balances,
+        "CRDR": crdr_flags,
+        "Year": m_year.group(1),
+    })
+
+
+# Parse every statement in parallel (map keeps the file order) and stack the rows;
+# the guard keeps worker imports (spawned on Windows) from re-running the batch.
+if __name__ == "__main__":
+    # 4. Collect, clean and save (Sheet1 detailed, Sheet2 summarized) via the shared driver in parsers.py
+    statement = Statement(
+        pdf_glob=pdf_glob,
+        output_excel=output_excel,
+        process_pdf=process_pdf,
+        clean_descriptions=partial(clean_exact_codes, code_to_name=CODE_TO_NAME),
+    )
+    df = collect(statement)
+
+    write_outputs(df, statement.output_excel)
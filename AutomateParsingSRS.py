@@ -1,192 +1,166 @@
-'''
-
-This script is used to parse the dividends text from the PDF file and save the results to an Excel file.
-uv init to create pyproject.toml, uv.lock and .venv/
-Install packages with uv and not pip. uv add pdfplumber pandas
-To run the scripy, uv run python ParseDividendsText.py
-'''
-
-
-import pdfplumber
-import pandas as pd
-import re
-
-# 1. Set your paths
-#pdf_path = r"1Page.pdf"
-pdf_path = r"05-SUPPLEMENTARY RETIREMENT SCHEME-0171-May-24.pdf"
-#pdf_path = r"06-SUPPLEMENTARY RETIREMENT SCHEME-0171-Jun-24.pdf"
-#pdf_path = r"07-SUPPLEMENTARY RETIREMENT SCHEME-0171-Jul-25.pdf"
-output_excel = r"srs_transaction_details.xlsx"
-
-# 2. Helper: parse one line of transaction text
-#    We only keep Date, Description and Credit amount
-
-def parse_transaction_line(line: str):
-    """Parse a single transaction line.
-
-    Only keep rows that look like dividend credits, for example:
-      '13MAY CR DIVIDENDS FOR 92FC 13.75 19,067.06'
-      '13MAY CR DIVIDENDS FOR SGX 34.00 19,101.06'
-      '21MAY CR DIVIDENDS FOR HAWP 100.00 17,024.11'
-
-    Pattern expected:
-        <DD><MON> CR DIVIDENDS FOR <something> <amount> <balance>
-    """
-
-    # Strict pattern:
-    #   1) Date token at the start, like 13MAY
-    #   2) Description that must contain 'CR DIVIDENDS FOR ...'
-    #   3) Two monetary values at the end: amount then balance
-    #   Group 1: (\d{2}[A-Z]{3}) where \d{2} → exactly two digits (day) and [A-Z]{3} → exactly three uppercase letters (month code)
-    #   \s+ means Requires one or more spaces
-    #   Group 2: (CR DIVIDENDS FOR\s+.+?) captures the description where .+? A short as possible (non-greedy) match of anything, representing the stock name or code
-    #   Group 3: ([0-9,]+\.\d{2}) captures [0-9,]+ → digits or commas (thousand separators), \. for literal decimal point and \d{2} → exactly two decimals
-    #   Group 4: ([0-9,]+\.\d{2}) captures the Balance after credit in the PDF
-
-    m = re.match(
-        r"^(\d{2}[A-Z]{3})\s+(CR DIVIDENDS FOR\s+.+?)\s+([0-9,]+\.\d{2})\s+([0-9,]+\.\d{2})\s*$",
-        line,
-    )
-   
-    if not m:
-        # Not a dividend credit row
-        return None
-
-    #print(f"Transaction lines extracted:{m}\n")
-
-    date_raw, description, amount_str, _balance_str = m.groups()
-
-    # Convert from '13MAY' to '13-May-2024'
-    month_map = {
-        "JAN": "Jan", "FEB": "Feb", "MAR": "Mar", "APR": "Apr",
-        "MAY": "May", "JUN": "Jun", "JUL": "Jul", "AUG": "Aug",
-        "SEP": "Sep", "OCT": "Oct", "NOV": "Nov", "DEC": "Dec",
-    }
-    day = date_raw[:2]
-    mon = month_map.get(date_raw[2:5], date_raw[2:5])
-    #IMPORTANT: The year is fixed to 2024. Change this if the year is different.
-    date = f"{day}-{mon}-25"
-
-    # For dividend rows, amount is always a credit
-    return {
-        "Date": date,
-        "Description": description,
-        "Credit ($)": amount_str,
-    }
-
-
-# 3. Open PDF and extract the TRANSACTION DETAILS block
-CODE_TO_NAME = {
-    "1EG0": "Nikko AM SGD Corp Bond ETF",
-    "SBIETF": "ABF SINGAPORE Bond Index",
-    "STETF": "STI ETF",
-    "1DH9": "NetLink NBN Trust",
-    "4H4M": "ASCOTT RESIDENCE TRUST",
-    "92FC": "Vicom",
-    "ASCEND": "Capitaland India Trust",
-    "CMT": "Capitaland Integrated Commercial Trust",
-    "CRCT": "CapitaLand Retail China Trust",
-    "F-LITR": "Frasers Logistics Commerical",
-    "HAWP": "Haw Par",
-    "KDCRET": "Keppel DC",
-    "MCT": "Mapletree Pan Asia",
-    "MITR": "Mapletree Industrial Trust",
-    "OCBCBK": "OCBC",
-    "PKREIT": "Parkway Life REITS",
-    "RMEDIC": "Raffles Medical",
-    "SGX": "SGX",
-    "STEL": "Singtel",
-}
-rows = []
-
-with pdfplumber.open(pdf_path) as pdf:
-    #print("pdf.pages")
-    for page in pdf.pages:
-        text = page.extract_text() or ""
-        #print("Printing text")
-        #print(f"text:{text}")
-        
-        if "TTRRAANNSSAACCTTIIOONN DDEETTAAIILLSS" not in text:
-            continue
-
-        # Keep only the part between "TRANSACTION DETAILS" and
-        # the next section header "SECURITY INVESTMENT ACTIVITY"
-        section = text.split("TTRRAANNSSAACCTTIIOONN DDEETTAAIILLSS", 1)[1]
-        
-        if "SECURITY INVESTMENT ACTIVITY" in section:
-            section = section.split("SECURITY INVESTMENT ACTIVITY", 1)[0]
-
-        for raw_line in section.splitlines():
-            line = raw_line.strip()
-            #print(f"Line:{line}\n")
-            # Pass every line in the TRANSACTION DETAILS section to the parser.
-            # The parser itself will decide if the line is a valid transaction row.
-            record = parse_transaction_line(line)
-            if record:
-                rows.append(record)
-                
-#print(f"Rows before cleaning:{rows}\n")
-
-# Clean Description field before saving
-# 1) Strip the fixed prefix 'CR DIVIDENDS FOR'
-# 2) Map short codes (92FC, HAWP, etc.) to full names via lookup table
-for r in rows:
-    desc = r["Description"]
-
-    # Remove prefix and trim
-    desc = desc.replace("CR DIVIDENDS FOR", "").strip()
-
-    # Map short code to full name if available
-    full_name = CODE_TO_NAME.get(desc, desc)
-    r["Description"] = full_name
-
-    # New fields for Excel
-    r["Ticker"] = ""              # empty for now
-    r["Year"] = "2024"            # fixed year
-    r["Currency"] = "SGD"         # fixed currency
-    r["Net Amount"] = r["Credit ($)"]  # same as Credit ($)
-
-print(f"Rows after cleaning:{rows}\n")
-
-# 4. Save to Excel (Date, Description, Credit only)
-#df = pd.DataFrame(rows, columns=["Date", "Description", "Credit ($)"])
-df = pd.DataFrame(rows)[["Description", "Ticker", "Year", "Date", "Currency", "Credit ($)", "Net Amount"]]
-
-
-# 5. Build summarized DataFrame (Sheet2)
-# Convert Credit ($) and Net Amount to numeric so they can be summed
-df_summary = df.copy()
-
-for col in ["Credit ($)", "Net Amount"]:
-    # Remove commas if any, then convert to float
-    df_summary[col] = (
-        df_summary[col]
-        .astype(str)
-        .str.replace(",", "", regex=False)
-        .astype(float)
-    )
-
-# Group by Description and other identifying fields
-# This collapses multiple payouts for the same company on the same date
-group_cols = ["Description", "Ticker", "Year", "Date", "Currency"]
-
-df_summary = (
-    df_summary
-    .groupby(group_cols, as_index=False)
-    .agg({
-        "Credit ($)": "sum",
-        "Net Amount": "sum",
-    })
-)
-
-# Optional: round to 2 decimal places
-df_summary["Credit ($)"] = df_summary["Credit ($)"].round(2)
-df_summary["Net Amount"] = df_summary["Net Amount"].round(2)
-
-# 6. Save to Excel with two sheets: Sheet1 (detailed), Sheet2 (summarized)
-with pd.ExcelWriter(output_excel) as writer:
-    df.to_excel(writer, sheet_name="Sheet1", index=False)
-    df_summary.to_excel(writer, sheet_name="Sheet2", index=False)
-
-print(f"Extracted {len(df)} detailed rows to {output_excel} (Sheet1)")
-print(f"Summarized to {len(df_summary)} rows in Sheet2")
+'''
+
+This script is used to parse the dividends text from the PDF file and save the results to an Excel file.
+uv init to create pyproject.toml, uv.lock and .venv/
+Install packages with uv and not pip. uv add pdfplumber pandas xlsxwriter
+To run the scripy, uv run python ParseDividendsText.py
+'''
+
+
+import pdfplumber
+import pandas as pd
+import re
+from functools import partial
+from pathlib import Path
+from parsers import DIVIDEND_PREFIX, Statement, clean_exact_codes, collect, write_outputs
+
+# 1. Set your paths
+# Every statement matching pdf_glob in this folder is parsed, one worker process per PDF.
+# Single files used before:
+#pdf_path = r"1Page.pdf"
+#pdf_path = r"05-SUPPLEMENTARY RETIREMENT SCHEME-0171-May-24.pdf"
+#pdf_path = r"06-SUPPLEMENTARY RETIREMENT SCHEME-0171-Jun-24.pdf"
+#pdf_path = r"07-SUPPLEMENTARY RETIREMENT SCHEME-0171-Jul-25.pdf"
+pdf_glob = "*SUPPLEMENTARY RETIREMENT SCHEME*.pdf"   # e.g. "05-SUPPLEMENTARY RETIREMENT SCHEME-0171-May-24.pdf"
+output_excel = r"srs_transaction_details.xlsx"
+
+# Statement year from the "-Mon-YY" file name suffix, e.g. "...-0171-May-24.pdf" -> "24".
+# The rows only carry DDMON, so each PDF's dates and Year come from its own file name.
+FILE_YEAR_RE = re.compile(r"-[A-Za-z]{3}-(\d{2})\.pdf$", re.IGNORECASE)
+
+# 2. Helper: turn one matched transaction line into a row
+#    We only keep Date, Description and Credit amount
+
+# Dividend credit row: DDMON, 'CR DIVIDENDS FOR ...', amount, balance.
+# MULTILINE so one finditer walks the whole section; [^\S\n] keeps each match on one line.
+TXN_RE = re.compile(
+    r"^[^\S\n]*(\d{2}[A-Z]{3})[^\S\n]+(" + re.escape(DIVIDEND_PREFIX)
+    + r"[^\S\n]+.+?)[^\S\n]+([0-9,]+\.\d{2})[^\S\n]+([0-9,]+\.\d{2})[^\S\n]*$",
+    flags=re.MULTILINE,
+)
+
+# Statement month code -> abbreviation, built once at import
+MONTHS_ABBR = {
+    "JAN": "Jan", "FEB": "Feb", "MAR": "Mar", "APR": "Apr",
+    "MAY": "May", "JUN": "Jun", "JUL": "Jul", "AUG": "Aug",
+    "SEP": "Sep", "OCT": "Oct", "NOV": "Nov", "DEC": "Dec",
+}
+
+def parse_transaction_match(m: re.Match, yy: str):
+    """Build one row tuple from a TXN_RE match; yy is the statement's two-digit year.
+
+    Only keep rows that look like dividend credits, for example:
+      '13MAY CR DIVIDENDS FOR 92FC 13.75 19,067.06'
+      '13MAY CR DIVIDENDS FOR SGX 34.00 19,101.06'
+      '21MAY CR DIVIDENDS FOR HAWP 100.00 17,024.11'
+
+    Pattern expected:
+        <DD><MON> CR DIVIDENDS FOR <something> <amount> <balance>
+    """
+
+    # Strict pattern (TXN_RE):
+    #   1) Date token at the start, like 13MAY
+    #   2) Description that must contain 'CR DIVIDENDS FOR ...'
+    #   3) Two monetary values at the end: amount then balance
+    #   Group 1: (\d{2}[A-Z]{3}) where \d{2} → exactly two digits (day) and [A-Z]{3} → exactly three uppercase letters (month code)
+    #   [^\S\n]+ means Requires one or more spaces (without crossing to the next line)
+    #   Group 2: (CR DIVIDENDS FOR[^\S\n]+.+?) captures the description where .+? A short as possible (non-greedy) match of anything, representing the stock name or code
+    #   Group 3: ([0-9,]+\.\d{2}) captures [0-9,]+ → digits or commas (thousand separators), \. for literal decimal point and \d{2} → exactly two decimals
+    #   Group 4: ([0-9,]+\.\d{2}) captures the Balance after credit in the PDF
+
+    #print(f"Transaction lines extracted:{m}\n")
+
+    date_raw, description, amount_str, _balance_str = m.groups()
+
+    # Convert from '13MAY' to '13-May-24'
+    day = date_raw[:2]
+    mon = MONTHS_ABBR.get(date_raw[2:5], date_raw[2:5])
+    date = f"{day}-{mon}-{yy}"
+
+    # For dividend rows, amount is always a credit
+    # (Date, Description, Credit ($)); the credit is numeric from the start, commas removed
+    return date, description, float(amount_str.replace(",", ""))
+
+
+# 3. Open PDF and extract the TRANSACTION DETAILS block
+CODE_TO_NAME = {
+    "1EG0": "Nikko AM SGD Corp Bond ETF",
+    "SBIETF": "ABF SINGAPORE Bond Index",
+    "STETF": "STI ETF",
+    "1DH9": "NetLink NBN Trust",
+    "4H4M": "ASCOTT RESIDENCE TRUST",
+    "92FC": "Vicom",
+    "ASCEND": "Capitaland India Trust",
+    "CMT": "Capitaland Integrated Commercial Trust",
+    "CRCT": "CapitaLand Retail China Trust",
+    "F-LITR": "Frasers Logistics Commerical",
+    "HAWP": "Haw Par",
+    "KDCRET": "Keppel DC",
+    "MCT": "Mapletree Pan Asia",
+    "MITR": "Mapletree Industrial Trust",
+    "OCBCBK": "OCBC",
+    "PKREIT": "Parkway Life REITS",
+    "RMEDIC": "Raffles Medical",
+    "SGX": "SGX",
+    "STEL": "Singtel",
+}
+
+def process_pdf(pdf_path: Path) -> pd.DataFrame:
+    """Parse one statement PDF into its raw transaction rows, tagged with the statement's Year."""
+    m_year = FILE_YEAR_RE.search(pdf_path.name)
+    if not m_year:
+        print(f"[SKIP] No -Mon-YY year suffix in file name: {pdf_path}")
+        return pd.DataFrame(columns=["Date", "Description", "Credit ($)", "Year"])
+    yy = m_year.group(1)
+
+    # One list per column, filled straight from the matches (no per-row dict to transpose)
+    dates, descriptions, credits = [], [], []
+
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        #print("pdf.pages")
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            page.close()  # only the text is used, so release the page's parsed layout now
+            #print("Printing text")
+            #print(f"text:{text}")
+        
+            # Keep only the part between "TRANSACTION DETAILS" and
+            # the next section header "SECURITY INVESTMENT ACTIVITY"
+            # (partition cuts at the first marker without building a list of pieces;
+            # a missing end marker leaves the section running to the end of the page)
+            _, found, section = text.partition("TTRRAANNSSAACCTTIIOONN DDEETTAAIILLSS")
+            if not found:
+                continue
+            section = section.partition("SECURITY INVESTMENT ACTIVITY")[0]
+
+            # Cheap substring pre-check: every dividend row contains this literal,
+            # so sections without it skip the regex scan entirely
+            if DIVIDEND_PREFIX not in section:
+                continue
+
+            # One finditer over the TRANSACTION DETAILS section;
+            # TXN_RE itself decides which lines are valid transaction rows.
+            for m in TXN_RE.finditer(section):
+                date, description, credit = parse_transaction_match(m, yy)
+                dates.append(date)
+                descriptions.append(description)
+                credits.append(credit)
+
+    return pd.DataFrame({"Date": dates, "Description": descriptions, "Credit ($)": credits, "Year": f"20{yy}"})
+
+
+# Parse every statement in parallel (map keeps the file order) and stack the rows;
+# the guard keeps worker imports (spawned on Windows) from re-running the batch.
+if __name__ == "__main__":
+    # 4. Collect, clean and save (Sheet1 detailed, Sheet2 summarized) via the shared driver in parsers.py
+    statement = Statement(
+        pdf_glob=pdf_glob,
+        output_excel=output_excel,
+        process_pdf=process_pdf,
+        clean_descriptions=partial(clean_exact_codes, code_to_name=CODE_TO_NAME),
+    )
+    df = collect(statement)
+
+    print(f"Rows after cleaning:{df.to_dict('records')}\n")
+
+    write_outputs(df, statement.output_excel)
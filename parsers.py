@@ -0,0 +1,101 @@
+'''
+
+Shared driver for the dividend statement parsers (AutomateParsingCDP.py, AutomateParsingSRS.py,
+AutomateParsingForeignStocks.py).
+Each script keeps its own regex and process_pdf, and describes itself with a Statement;
+collecting the rows, the Sheet2 summary and the Excel writing live here once.
+'''
+
+
+import pandas as pd
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+# Sheet1 column order, and the fields Sheet2 groups on
+OUTPUT_COLUMNS = ["Description", "Ticker", "Year", "Date", "Currency", "Credit ($)", "Net Amount"]
+GROUP_COLUMNS = ["Description", "Ticker", "Year", "Date", "Currency"]
+AMOUNT_COLUMNS = ["Credit ($)", "Net Amount"]
+
+# Fixed prefix on every dividend description
+DIVIDEND_PREFIX = "CR DIVIDENDS FOR"
+
+@dataclass(frozen=True)
+class Statement:
+    """One statement type: which PDFs to read, how to parse and clean them, and the fixed fields.
+
+    process_pdf returns each file's rows with their own Year column, so a batch
+    spanning several years keeps every row's year.
+    """
+    pdf_glob: str
+    output_excel: str
+    process_pdf: Callable[[Path], pd.DataFrame]                 # module-level, so workers can unpickle it
+    clean_descriptions: Callable[[pd.Series], pd.Series]
+    currency: str = "SGD"
+
+def clean_exact_codes(raw_desc: pd.Series, code_to_name: dict[str, str]) -> pd.Series:
+    """Strip the fixed prefix and map a description that is exactly a short code (92FC, HAWP, ...)."""
+    # Remove prefix and trim
+    desc = raw_desc.str.replace(DIVIDEND_PREFIX, "", regex=False).str.strip()
+
+    # Map short code to full name if available
+    return desc.map(code_to_name).fillna(desc)
+
+def collect(stmt: Statement) -> pd.DataFrame:
+    """Parse every matching PDF (one worker process per PDF) into the cleaned Sheet1 rows."""
+    pdf_files = sorted(Path(".").glob(stmt.pdf_glob))
+    if not pdf_files:
+        raise FileNotFoundError(f"No statement PDFs matching {stmt.pdf_glob!r} found")
+
+    with ProcessPoolExecutor() as ex:
+        df = pd.concat(ex.map(stmt.process_pdf, pdf_files), ignore_index=True)
+
+    # All-empty frames concat to untyped (float) columns, so stop here rather than fail on .str below
+    if df.empty:
+        raise SystemExit(f"No dividend rows found in the {len(pdf_files)} PDF(s) matching {stmt.pdf_glob!r}")
+
+    # Clean Description field before saving (vectorized over the whole column)
+    df["Description"] = stmt.clean_descriptions(df["Description"])
+
+    # New fields for Excel, added in a single assign rather than one insert per column
+    return df.assign(
+        Ticker="",                           # empty for now
+        Currency=stmt.currency,              # fixed currency
+        **{"Net Amount": df["Credit ($)"]},  # same as Credit ($)
+    )
+
+def write_outputs(df: pd.DataFrame, output_excel: str) -> None:
+    """Save the detailed rows (Sheet1) and their per-payout summary (Sheet2)."""
+    df = df[OUTPUT_COLUMNS]
+
+    # Build summarized DataFrame (Sheet2)
+    # Credit ($) is already a float (converted at parse time), so df is grouped
+    # directly; groupby builds a new frame, so no defensive copy of df is needed.
+    # This collapses multiple payouts for the same company on the same date.
+
+    # Group on categorical keys so groupby works on integer codes instead of hashing strings;
+    # the categories are sorted, so Sheet2 keeps the same row order as grouping the strings
+    group_keys = df[GROUP_COLUMNS + ["Credit ($)"]].astype({c: "category" for c in GROUP_COLUMNS})
+    df_summary = group_keys.groupby(GROUP_COLUMNS, as_index=False, observed=True)[["Credit ($)"]].sum()
+
+    # Optional: round to 2 decimal places
+    df_summary["Credit ($)"] = df_summary["Credit ($)"].round(2)
+
+    # Net Amount always equals Credit ($), so sum once and copy the total across
+    df_summary["Net Amount"] = df_summary["Credit ($)"]
+
+    # Save to Excel with two sheets: Sheet1 (detailed), Sheet2 (summarized)
+    with pd.ExcelWriter(output_excel, engine="xlsxwriter") as writer:
+        df.to_excel(writer, sheet_name="Sheet1", index=False)
+        df_summary.to_excel(writer, sheet_name="Sheet2", index=False)
+
+        # Amounts are floats from parse time; format them only here, so Sheet1 still
+        # shows the statement's text form (19,067.06) while the cells stay numeric
+        amount_format = writer.book.add_format({"num_format": "#,##0.00"})
+        for col in AMOUNT_COLUMNS:
+            idx = OUTPUT_COLUMNS.index(col)
+            writer.sheets["Sheet1"].set_column(idx, idx, None, amount_format)
+
+    print(f"Extracted {len(df)} detailed rows to {output_excel} (Sheet1)")
+    print(f"Summarized to {len(df_summary)} rows in Sheet2")